@@ -0,0 +1,105 @@
+"""Timing and reporting helpers shared by the offline benchmarks."""
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from typing import Any, Awaitable, Callable
+
+METRIC_KEYS = ("iterations", "ops_per_sec", "p50_ms", "p99_ms")
+
+
+def summarize(name: str, timings: list[float], **params: Any) -> dict[str, Any]:
+    """Summarize a list of durations (in seconds) of single operations."""
+    timings = sorted(timings)
+    total = sum(timings)
+    return {
+        "name": name,
+        **params,
+        "iterations": len(timings),
+        "ops_per_sec": len(timings) / total if total else 0.0,
+        "p50_ms": statistics.median(timings) * 1000,
+        "p99_ms": timings[max(0, int(len(timings) * 0.99) - 1)] * 1000,
+    }
+
+
+def measure(
+    name: str,
+    func: Callable[[], Any],
+    iterations: int,
+    **params: Any,
+) -> dict[str, Any]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return summarize(name, timings, **params)
+
+
+async def measure_async(
+    name: str,
+    func: Callable[[], Awaitable[Any]],
+    iterations: int,
+    **params: Any,
+) -> dict[str, Any]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - start)
+    return summarize(name, timings, **params)
+
+
+def print_result(result: dict[str, Any]) -> None:
+    params = ", ".join(
+        f"{k}={v}" for k, v in result.items() if k not in ("name", *METRIC_KEYS)
+    )
+    label = f"{result['name']} ({params})" if params else result["name"]
+    print(
+        f"{label:<52} {result['ops_per_sec']:>12.1f} ops/s"
+        f"   p50 {result['p50_ms']:8.3f} ms   p99 {result['p99_ms']:8.3f} ms"
+    )
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(path: str, results: list[dict[str, Any]]) -> None:
+    data = {
+        "timestamp": time.time(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def compare_results(path: str, results: list[dict[str, Any]]) -> None:
+    """Print throughput change against results stored in a previous run."""
+    with open(path) as f:
+        previous = json.load(f)
+
+    def key(result: dict[str, Any]) -> str:
+        return json.dumps(
+            {k: v for k, v in result.items() if k not in METRIC_KEYS},
+            sort_keys=True,
+        )
+
+    baseline = {key(r): r for r in previous["results"]}
+    print(f"\nCompared to {previous.get('revision') or path}:")
+    for result in results:
+        if (old := baseline.get(key(result))) is None or not old["ops_per_sec"]:
+            continue
+        change = result["ops_per_sec"] / old["ops_per_sec"] - 1
+        print(f"{result['name']:<40} {change:+8.1%}")
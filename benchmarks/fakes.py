@@ -0,0 +1,462 @@
+"""Stand-in ayon_server services for running the addon offline.
+
+`install()` registers lightweight fake `ayon_server` (and `nxtools`)
+modules, so the server part of the addon can be imported and exercised
+without a running AYON stack. Only the parts of the API the addon uses
+are implemented. Database access is served from an in-memory
+`FakeDatabase`, so the benchmarks measure the addon overhead,
+not PostgreSQL.
+
+pydantic (v1) and fastapi have to be installed.
+"""
+
+import bisect
+import inspect
+import json
+import random
+import re
+import sys
+import types
+import uuid
+from typing import Any, AsyncGenerator, Callable
+
+FOLDER_TYPES = ["Asset", "Shot", "Sequence", "Folder"]
+
+# Offset between the uuid1 and the unix epoch in 100 ns intervals
+UUID1_EPOCH = 0x01B21DD213814000
+
+
+def burst_uuid1(ticks: int, node: int) -> str:
+    """Return an id like ayon_server.utils.create_uuid() at the given time.
+
+    `ticks` is the time in 100 ns intervals since the Unix epoch.
+    """
+    ticks += UUID1_EPOCH
+    return uuid.UUID(
+        fields=(
+            ticks & 0xFFFFFFFF,
+            (ticks >> 32) & 0xFFFF,
+            (ticks >> 48) & 0x0FFF | 0x1000,
+            0x80,
+            0,
+            node,
+        )
+    ).hex
+
+
+def burst_uuid1s(count: int, seed: int = 0) -> list[str]:
+    """Return ids of entities created in bursts, like real folder ids.
+
+    Folders are created mostly by imports and templates, so the ids
+    come in bursts of up to thousands of entities per second,
+    separated by hours or days.
+    """
+    rnd = random.Random(seed)
+    node = rnd.getrandbits(48)
+    # Integer ticks, float seconds are not precise enough for 100 ns
+    ticks = 1_700_000_000 * 10_000_000
+    ids: list[str] = []
+    while len(ids) < count:
+        ticks += int(rnd.uniform(3600, 3 * 86400) * 10_000_000)
+        for _ in range(min(count - len(ids), rnd.randint(10, 5000))):
+            # uuid1 ids are unique, even when created in the same tick
+            ticks += 1 + int(rnd.expovariate(2000) * 10_000_000)
+            ids.append(burst_uuid1(ticks, node))
+    return ids
+
+
+class FakeDatabase:
+    """In-memory projects and folders, answering the addon queries."""
+
+    def __init__(self):
+        self.projects: dict[str, dict[str, dict[str, Any]]] = {}
+        # project -> folder_type -> sorted ids
+        self._index: dict[str, dict[str, list[str]]] = {}
+        self.queries = 0
+
+    def add_project(self, name: str, folder_count: int, seed: int = 0) -> None:
+        folders = {}
+        for i, folder_id in enumerate(burst_uuid1s(folder_count, seed)):
+            folders[folder_id] = {
+                "id": folder_id,
+                "name": f"folder_{i}",
+                "label": None,
+                "folder_type": FOLDER_TYPES[i % len(FOLDER_TYPES)],
+                "parent_id": None,
+                "thumbnail_id": None,
+                "own_attrib": {"fps": 25},
+                "data": {},
+                "active": True,
+                "status": "Not ready",
+                "tags": [],
+                "created_at": None,
+                "updated_at": None,
+                "path": f"folder_{i}",
+                "inherited_attrib": None,
+                "project_attrib": {"fps": 24, "resolutionWidth": 1920},
+            }
+        self.projects[name] = folders
+        index: dict[str, list[str]] = {}
+        for folder_id, folder in folders.items():
+            index.setdefault(folder["folder_type"], []).append(folder_id)
+        for ids in index.values():
+            ids.sort()
+        self._index[name] = index
+
+    def _project(self, query: str) -> str | None:
+        """Return the project the query reads, None when it does not exist.
+
+        Queries reading tables of a missing project schema fail the same
+        way as in PostgreSQL, except `to_regclass`, which returns NULL.
+        """
+        match = re.search(r"project_(\w+)\.", query)
+        if match and match.group(1) in self.projects:
+            return match.group(1)
+        if "to_regclass" in query:
+            return None
+        if "::regclass" in query:
+            raise FakePostgres.InvalidSchemaNameError()
+        raise FakePostgres.UndefinedTableError()
+
+    def execute(self, query: str, *args: Any) -> list[dict[str, Any]]:
+        self.queries += 1
+        if "FROM projects" in query:
+            return [{"name": name} for name in self.projects]
+
+        project = self._project(query)
+        if project is None:
+            return []
+        folders = self.projects[project]
+
+        if "reltuples" in query:
+            return [{"reltuples": float(len(folders))}]
+
+        if "AS inherited_attrib" in query:
+            access_list, _, *params = args
+            if "f.id = ANY" in query:
+                rows = [folders[i] for i in params[0] if i in folders]
+            else:
+                folder_type = params[0]
+                after = params[1] if "f.id >" in query else None
+                ids = self._index[project].get(folder_type, [])
+                start = bisect.bisect_right(ids, after) if after else 0
+                rows = [folders[i] for i in ids[start:]]
+            return [dict(row) for row in rows]
+
+        if "TABLESAMPLE" in query:
+            # Rows are sampled one by one, not in pages
+            folder_type, percent, *limit = args
+            count = limit[0] if limit else 1
+            ids = self._index[project].get(folder_type, [])
+            sample = random.sample(ids, round(len(ids) * percent / 100))
+            if not sample and "UNION ALL" in query:
+                sample = ids
+            picked = random.sample(sample, min(count, len(sample)))
+            return [{"id": folder_id} for folder_id in picked]
+
+        if "RANDOM()" in query:
+            folder_type, count = args
+            ids = self._index[project].get(folder_type, [])
+            return [{"id": i} for i in random.sample(ids, min(count, len(ids)))]
+
+        raise NotImplementedError(f"FakeDatabase does not understand {query}")
+
+
+class FakePostgres:
+    db = FakeDatabase()
+
+    class UndefinedTableError(Exception):
+        pass
+
+    class InvalidSchemaNameError(Exception):
+        pass
+
+    @classmethod
+    async def fetch(cls, query: str, *args: Any) -> list[dict[str, Any]]:
+        return cls.db.execute(query, *args)
+
+    @classmethod
+    async def iterate(cls, query: str, *args: Any) -> AsyncGenerator[dict, None]:
+        for row in cls.db.execute(query, *args):
+            yield row
+
+
+class FakeUserEntity:
+    def __init__(self, name: str = "admin", is_manager: bool = True):
+        self.name = name
+        self.is_manager = is_manager
+
+
+class FakeFolderEntity:
+    def __init__(self, project_name: str, payload: dict[str, Any]):
+        self.project_name = project_name
+        self.payload = payload
+
+    @property
+    def id(self) -> str:
+        return self.payload["id"]
+
+    @property
+    def updated_at(self) -> Any:
+        return self.payload["updated_at"]
+
+    @classmethod
+    def from_record(cls, project_name: str, payload: dict[str, Any]):
+        return cls(project_name, payload)
+
+    @classmethod
+    async def load(cls, project_name: str, entity_id: str):
+        folder = FakePostgres.db.projects[project_name][entity_id]
+        payload = dict(folder)
+        attrib = dict(payload.pop("project_attrib"))
+        attrib.update(payload.pop("own_attrib"))
+        payload.pop("inherited_attrib")
+        payload["attrib"] = attrib
+        return cls(project_name, payload)
+
+    async def ensure_read_access(self, user: FakeUserEntity) -> None:
+        pass
+
+    def as_user(self, user: FakeUserEntity) -> dict[str, Any]:
+        return dict(self.payload)
+
+
+class FakeEventModel:
+    def __init__(
+        self,
+        topic: str,
+        description: str = "",
+        project: str | None = None,
+        summary: dict[str, Any] | None = None,
+        payload: dict[str, Any] | None = None,
+    ):
+        self.id = uuid.uuid4().hex
+        self.topic = topic
+        self.description = description
+        self.project = project
+        self.summary = summary or {}
+        self.payload = payload or {}
+
+
+class FakeEventStream:
+    hooks: dict[str, list[Callable]] = {}
+
+    @classmethod
+    def subscribe(cls, topic: str, handler: Callable, all_nodes: bool = False):
+        cls.hooks.setdefault(topic, []).append(handler)
+
+    @classmethod
+    async def dispatch(cls, topic: str, store: bool = True, **kwargs: Any) -> str:
+        # All addon instances share the hooks, like nodes
+        # sharing the server messaging
+        event = FakeEventModel(topic, **kwargs)
+        for handler in cls.hooks.get(topic, []):
+            await handler(event)
+        return event.id
+
+
+class FakeBaseServerAddon:
+    settings_model: Any = None
+    site_settings_model: Any = None
+
+    def __init__(self, name: str = "example", version: str = "0.0.0"):
+        self.name = name
+        self.version = version
+        self.endpoints: list[dict[str, Any]] = []
+        self.settings_loads = 0
+        self.initialize()
+
+    def initialize(self) -> None:
+        pass
+
+    def add_endpoint(self, path: str, handler: Callable, **kwargs: Any) -> None:
+        self.endpoints.append({"path": path, "handler": handler, **kwargs})
+
+    # Settings are always built from the model defaults, including
+    # the validation, which is what the real getters spend time on.
+
+    async def get_studio_settings(self, variant: str = "production"):
+        self.settings_loads += 1
+        return self.settings_model()
+
+    async def get_project_settings(
+        self,
+        project_name: str,
+        variant: str = "production",
+    ):
+        self.settings_loads += 1
+        return self.settings_model()
+
+
+def _submodels(model: Any, found: dict[str, Any]) -> dict[str, Any]:
+    for field in model.__fields__.values():
+        if isinstance(field.type_, type) and hasattr(field.type_, "__fields__"):
+            if field.type_.__name__ not in found:
+                found[field.type_.__name__] = field.type_
+                _submodels(field.type_, found)
+    return found
+
+
+async def postprocess_settings_schema(
+    schema: dict[str, Any],
+    model: Any,
+    is_top_level: bool = True,
+    context: dict[str, Any] | None = None,
+) -> None:
+    """Postprocess the schema like the server does for the settings UI.
+
+    Enum resolvers are called with the context, and the private
+    attributes of the models (`_layout`, `_isGroup`, `_title`)
+    are added to their schemas.
+    """
+    context = context or {}
+    for attr, key in (("_layout", "layout"), ("_isGroup", "isgroup"), ("_title", "title")):
+        if (private := model.__private_attributes__.get(attr)) is not None:
+            schema[key] = private.default
+
+    for prop in schema.get("properties", {}).values():
+        if (resolver := prop.pop("enum_resolver", None)) is None:
+            continue
+        params = inspect.signature(resolver).parameters
+        values = resolver(**{k: v for k, v in context.items() if k in params})
+        if inspect.isawaitable(values):
+            values = await values
+        enum = [v["value"] if isinstance(v, dict) else v for v in values]
+        if prop.get("type") == "array":
+            prop["items"] = {**prop.get("items", {}), "enum": enum}
+            prop["uniqueItems"] = True
+        else:
+            prop["enum"] = enum
+        if values and isinstance(values[0], dict):
+            prop["enumLabels"] = {v["value"]: v["label"] for v in values}
+
+    if is_top_level:
+        submodels = _submodels(model, {})
+        for name, definition in schema.get("definitions", {}).items():
+            await postprocess_settings_schema(
+                definition, submodels[name], is_top_level=False, context=context
+            )
+
+
+class FakeException(Exception):
+    status = 500
+
+    def __init__(self, detail: str = ""):
+        super().__init__(detail)
+        self.detail = detail
+
+
+def _module(name: str, **attrs: Any) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+def install() -> None:
+    """Register fake ayon_server and nxtools modules."""
+
+    from pydantic import BaseModel
+
+    class BaseSettingsModel(BaseModel):
+        class Config:
+            underscore_attrs_are_private = True
+
+    class NotFoundException(FakeException):
+        status = 404
+
+    class ForbiddenException(FakeException):
+        status = 403
+
+    class BadRequestException(FakeException):
+        status = 400
+
+    def ensure_unique_names(objects: list[Any]) -> None:
+        names = []
+        for obj in objects:
+            if obj.name in names:
+                raise BadRequestException(f"Duplicate name {obj.name}")
+            names.append(obj.name)
+
+    def normalize_name(name: str) -> str:
+        return re.sub(r"[^a-zA-Z0-9_\-\.]", "_", name.strip())
+
+    async def folder_types_enum(project_name: str | None = None):
+        return FOLDER_TYPES
+
+    async def anatomy_presets_enum():
+        return ["__primary__"]
+
+    def addon_all_app_host_names_enum():
+        return ["maya", "nuke", "houdini"]
+
+    async def folder_access_list(user, project_name, access_type="read"):
+        return None
+
+    def json_dumps(data: Any) -> str:
+        return json.dumps(data, default=str)
+
+    def noop(*args: Any, **kwargs: Any) -> None:
+        pass
+
+    _module(
+        "nxtools",
+        logging=types.SimpleNamespace(
+            debug=noop, info=noop, warning=noop, error=noop
+        ),
+        log_traceback=noop,
+    )
+    _module("ayon_server")
+    _module("ayon_server.addons", BaseServerAddon=FakeBaseServerAddon)
+    _module("ayon_server.access")
+    _module("ayon_server.access.utils", folder_access_list=folder_access_list)
+    _module("ayon_server.api")
+    _module(
+        "ayon_server.api.dependencies",
+        CurrentUser=FakeUserEntity,
+        ProjectName=str,
+    )
+    _module(
+        "ayon_server.entities",
+        FolderEntity=FakeFolderEntity,
+        UserEntity=FakeUserEntity,
+    )
+    _module(
+        "ayon_server.events",
+        EventStream=FakeEventStream,
+        EventModel=FakeEventModel,
+    )
+    _module(
+        "ayon_server.exceptions",
+        NotFoundException=NotFoundException,
+        ForbiddenException=ForbiddenException,
+        BadRequestException=BadRequestException,
+    )
+    _module("ayon_server.lib")
+    _module("ayon_server.lib.postgres", Postgres=FakePostgres)
+    _module(
+        "ayon_server.settings",
+        BaseSettingsModel=BaseSettingsModel,
+        ensure_unique_names=ensure_unique_names,
+        normalize_name=normalize_name,
+    )
+    _module(
+        "ayon_server.settings.postprocess",
+        postprocess_settings_schema=postprocess_settings_schema,
+    )
+    _module(
+        "ayon_server.settings.enum",
+        folder_types_enum=folder_types_enum,
+        anatomy_presets_enum=anatomy_presets_enum,
+        addon_all_app_host_names_enum=addon_all_app_host_names_enum,
+    )
+    _module(
+        "ayon_server.types",
+        ColorRGB_hex=str,
+        ColorRGBA_hex=str,
+        ColorRGB_float=tuple[float, float, float],
+        ColorRGBA_float=tuple[float, float, float, float],
+        ColorRGB_uint8=tuple[int, int, int],
+        ColorRGBA_uint8=tuple[int, int, int, float],
+    )
+    _module("ayon_server.utils", json_dumps=json_dumps)
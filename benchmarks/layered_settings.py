@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+"""Measure incremental merging of layered settings overrides.
+
+Many projects share one studio layer. The benchmark resolves
+`ExampleSettings` of all projects and their sites after a change of
+a single project and after a change of the studio layer, merging and
+validating all layers from scratch ("before") and with `SettingsLayers`
+("after"). Run from the repository root:
+
+    python -m benchmarks.layered_settings
+"""
+
+import argparse
+from typing import Any
+
+from benchmarks import fakes
+from benchmarks.common import measure, print_result, write_results
+
+fakes.install()
+
+from server.layers import SettingsLayers, merge_overrides  # noqa: E402
+from server.settings import ExampleSettings  # noqa: E402
+
+VARIANT = "production"
+
+
+def project_overrides(index: int) -> dict[str, Any]:
+    return {
+        "simple_string": f"project_{index}",
+        "grouped_settings": {"your_name": f"user_{index}"},
+    }
+
+
+def site_overrides(index: int) -> dict[str, Any]:
+    return {"simple_string": f"site_{index}"}
+
+
+def run(projects: int, sites: int, iterations: int) -> list[dict[str, Any]]:
+    defaults = ExampleSettings().dict()
+    studio = {"grouped_settings": {"favorite_color": "#ff0000"}}
+    project_names = [f"project_{i}" for i in range(projects)]
+    site_ids = [f"site_{i}" for i in range(sites)]
+
+    # Before: every resolve merges all the layers again
+
+    layers: dict[tuple[str, ...], dict[str, Any]] = {(VARIANT,): studio}
+    for i, project_name in enumerate(project_names):
+        layers[(VARIANT, project_name)] = project_overrides(i)
+        for j, site_id in enumerate(site_ids):
+            layers[(VARIANT, project_name, site_id)] = site_overrides(j)
+
+    def naive_resolve(key: tuple[str, ...]) -> ExampleSettings:
+        result = defaults
+        for depth in range(1, len(key) + 1):
+            result = merge_overrides(result, layers.get(key[:depth], {}))
+        return ExampleSettings(**result)
+
+    # After: merged layers are cached
+
+    engine = SettingsLayers(
+        defaults,
+        build=lambda merged: ExampleSettings(**merged),
+        maxsize=len(layers) + 1,
+    )
+    for key, overrides in layers.items():
+        engine.set_layer(key, overrides)
+
+    def resolve_all(resolve: Any) -> None:
+        for project_name in project_names:
+            resolve((VARIANT, project_name))
+            for site_id in site_ids:
+                resolve((VARIANT, project_name, site_id))
+
+    resolve_all(engine.resolve_model)  # warm up
+
+    counter = iter(range(10**9))
+
+    def project_changed(resolve: Any, set_layer: Any) -> Any:
+        def func() -> None:
+            i = next(counter)
+            # Offset, so the overrides differ from the initial ones
+            overrides = project_overrides(projects + i)
+            set_layer((VARIANT, project_names[i % projects]), overrides)
+            resolve_all(resolve)
+
+        return func
+
+    def studio_changed(resolve: Any, set_layer: Any) -> Any:
+        def func() -> None:
+            i = next(counter)
+            set_layer((VARIANT,), {"simple_string": f"studio_{i}"})
+            resolve_all(resolve)
+
+        return func
+
+    cases = {
+        "before": (naive_resolve, layers.__setitem__),
+        "after": (engine.resolve_model, engine.set_layer),
+    }
+    params = {"projects": projects, "sites": sites}
+
+    results = []
+    for variant, (resolve, set_layer) in cases.items():
+        for name, factory, count in (
+            ("resolve all after project change", project_changed, iterations),
+            ("resolve all after studio change", studio_changed, iterations // 5),
+        ):
+            builds = engine.builds
+            result = measure(
+                name,
+                factory(resolve, set_layer),
+                max(1, count),
+                variant=variant,
+                **params,
+            )
+            if variant == "after":
+                result["builds"] = engine.builds - builds
+            results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--projects", type=int, default=500)
+    parser.add_argument("--sites", type=int, default=2)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--output", help="Write results to a JSON file")
+    args = parser.parse_args()
+
+    results = run(args.projects, args.sites, args.iterations)
+    for result in results:
+        print_result(result)
+    if args.output:
+        write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+
+"""Measure name lookups and validation of named submodel lists.
+
+Compares a linear scan by name with NamedList.by_name and the
+original ensure_unique_names validation with the index-based one,
+for lists of thousands of entries. Run from the repository root:
+
+    python -m benchmarks.named_list
+"""
+
+import argparse
+import random
+from typing import Any
+
+from benchmarks import fakes
+from benchmarks.common import measure, print_result, write_results
+
+fakes.install()
+
+from ayon_server.settings import ensure_unique_names  # noqa: E402
+from server.named_list import NamedList  # noqa: E402
+from server.settings import DictLikeSubmodel, ExampleSettings  # noqa: E402
+
+
+def linear_lookup(items: list[Any], name: str) -> Any:
+    for item in items:
+        if item.name == name:
+            return item
+    return None
+
+
+def run(sizes: list[int], iterations: int) -> list[dict[str, Any]]:
+    results = []
+    for size in sizes:
+        items = [DictLikeSubmodel(name=f"item_{i}", value1=str(i)) for i in range(size)]
+        named = NamedList.validate_unique(items)
+        names = [f"item_{random.randrange(size)}" for _ in range(iterations)]
+        lookups = iter(names * 2)
+
+        results.append(
+            measure(
+                "lookup linear",
+                lambda: linear_lookup(items, next(lookups)),
+                iterations,
+                entries=size,
+            )
+        )
+        results.append(
+            measure(
+                "lookup by_name",
+                lambda: named.by_name(next(lookups)),
+                iterations,
+                entries=size,
+            )
+        )
+
+        validation_iterations = max(1, iterations // 1000)
+        results.append(
+            measure(
+                "unique names ensure_unique_names",
+                lambda: ensure_unique_names(items),
+                validation_iterations,
+                entries=size,
+            )
+        )
+        results.append(
+            measure(
+                "unique names NamedList",
+                lambda: NamedList.validate_unique(items),
+                validation_iterations,
+                entries=size,
+            )
+        )
+
+        data = {"dict_like_list": [item.dict() for item in items]}
+        results.append(
+            measure(
+                "ExampleSettings validation",
+                lambda: ExampleSettings(**data),
+                validation_iterations,
+                entries=size,
+            )
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 5000])
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--output", help="Write results to a JSON file")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.iterations)
+    for result in results:
+        print_result(result)
+    if args.output:
+        write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
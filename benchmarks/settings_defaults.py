@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+"""Measure construction of ExampleSettings with and without cached defaults.
+
+Default submodels and lists of the settings models are materialized
+from cached prototypes (see `server/defaults.py`). This benchmark
+compares it with building them from scratch by calling the original
+factories, in both time and allocated memory. Run from the repository
+root:
+
+    python -m benchmarks.settings_defaults
+"""
+
+import argparse
+import contextlib
+import tracemalloc
+from typing import Any, Iterator
+
+from benchmarks import fakes
+from benchmarks.common import measure, print_result, write_results
+
+fakes.install()
+
+from server.settings import ExampleSettings  # noqa: E402
+
+
+def iter_fields(model: Any) -> Iterator[Any]:
+    for field in model.__fields__.values():
+        yield field
+        if isinstance(field.type_, type) and hasattr(field.type_, "__fields__"):
+            yield from iter_fields(field.type_)
+
+
+@contextlib.contextmanager
+def uncached_defaults() -> Iterator[None]:
+    """Temporarily replace cached default factories by the original ones."""
+    replaced = []
+    for field in iter_fields(ExampleSettings):
+        factory = field.default_factory
+        if factory is not None and hasattr(factory, "build"):
+            field.default_factory = factory.build
+            replaced.append((field, factory))
+    try:
+        yield
+    finally:
+        for field, factory in replaced:
+            field.default_factory = factory
+
+
+def allocations(func: Any, iterations: int) -> tuple[int, int]:
+    """Return (peak, retained) bytes allocated per call."""
+    func()  # warm up, so the prototypes are not counted
+    tracemalloc.start()
+    peak = 0
+    start, _ = tracemalloc.get_traced_memory()
+    for _ in range(iterations):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        peak += tracemalloc.get_traced_memory()[1] - current
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak // iterations, (end - start) // iterations
+
+
+def run(iterations: int) -> list[dict[str, Any]]:
+    overrides = {"simple_string": "override", "grouped_settings": {"your_name": "x"}}
+    cases = {
+        "construct": lambda: ExampleSettings(),
+        "validate": lambda: ExampleSettings(**overrides),
+    }
+
+    results = []
+    for variant in ("before", "after"):
+        ctx = uncached_defaults() if variant == "before" else contextlib.nullcontext()
+        with ctx:
+            for name, func in cases.items():
+                kept: list[Any] = []
+                result = measure(
+                    f"ExampleSettings {name}",
+                    func,
+                    iterations,
+                    variant=variant,
+                )
+                # Keep the instances alive, so their memory is counted
+                peak, retained = allocations(lambda: kept.append(func()), 100)
+                result["peak_bytes"] = peak
+                result["retained_bytes"] = retained
+                results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--output", help="Write results to a JSON file")
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    for result in results:
+        print_result(result)
+    if args.output:
+        write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
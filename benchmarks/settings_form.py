@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+
+"""Measure settings form render time.
+
+Rendering the settings form resolves every enum resolver of the
+settings model. This benchmark renders the ExampleSettings form for
+a project repeatedly, once with the original recursive_enum_resolver
+(resolving the whole project settings on each call) and once with
+the memoized one. Run from the repository root:
+
+    python -m benchmarks.settings_form
+"""
+
+import argparse
+import asyncio
+import inspect
+from typing import Any, Callable
+
+from benchmarks import fakes
+from benchmarks.common import measure_async, print_result, write_results
+
+fakes.install()
+
+from server import ExampleAddon  # noqa: E402
+from server import settings as settings_module  # noqa: E402
+from server.settings import ExampleSettings  # noqa: E402
+
+PROJECT_NAME = "bench"
+
+
+async def legacy_recursive_enum_resolver(
+    addon,
+    project_name: str | None = None,
+    settings_variant: str = "production",
+) -> list[str]:
+    """recursive_enum_resolver before memoization"""
+    if addon is None:
+        return []
+
+    if project_name:
+        settings = await addon.get_project_settings(
+            project_name=project_name, variant=settings_variant
+        )
+    else:
+        settings = await addon.get_studio_settings(variant=settings_variant)
+
+    return settings.list_of_strings
+
+
+def collect_resolvers(model: Any) -> list[Callable]:
+    """Return enum resolvers of all fields of the model and its submodels."""
+    resolvers = []
+    for field in model.__fields__.values():
+        if resolver := field.field_info.extra.get("enum_resolver"):
+            resolvers.append(resolver)
+        if inspect.isclass(field.type_) and hasattr(field.type_, "__fields__"):
+            resolvers.extend(collect_resolvers(field.type_))
+    return resolvers
+
+
+async def render_form(resolvers: list[Callable], context: dict[str, Any]) -> None:
+    """Call the resolvers the way the server does when rendering the form."""
+    for resolver in resolvers:
+        params = inspect.signature(resolver).parameters
+        kwargs = {k: v for k, v in context.items() if k in params}
+        result = resolver(**kwargs)
+        if inspect.isawaitable(result):
+            await result
+
+
+async def run(iterations: int) -> list[dict[str, Any]]:
+    fakes.FakePostgres.db.add_project(PROJECT_NAME, 0)
+    addon = ExampleAddon()
+    context = {
+        "addon": addon,
+        "project_name": PROJECT_NAME,
+        "settings_variant": "production",
+    }
+    current = collect_resolvers(ExampleSettings)
+    legacy = [
+        legacy_recursive_enum_resolver
+        if r is settings_module.recursive_enum_resolver
+        else r
+        for r in current
+    ]
+
+    return [
+        await measure_async(
+            "settings_form_render",
+            lambda: render_form(legacy, context),
+            iterations,
+            variant="before",
+        ),
+        await measure_async(
+            "settings_form_render",
+            lambda: render_form(current, context),
+            iterations,
+            variant="after",
+        ),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--output", help="Write results to a JSON file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.iterations))
+    for result in results:
+        print_result(result)
+    if args.output:
+        write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+
+"""Compare settings models with compiled read-only snapshots.
+
+Measures memory held by a resolved ExampleSettings instance and by
+its snapshot, and the time of typical hot-path attribute reads.
+Run from the repository root:
+
+    python -m benchmarks.settings_snapshot
+"""
+
+import argparse
+import tracemalloc
+from typing import Any, Callable
+
+from benchmarks import fakes
+from benchmarks.common import measure, print_result, write_results
+
+fakes.install()
+
+from server.settings import ExampleSettings  # noqa: E402
+from server.snapshot import compile_snapshot, normalize_color  # noqa: E402
+
+COPIES = 1000
+
+
+def retained_bytes(build: Callable[[], Any]) -> int:
+    """Return memory retained by one object created by build."""
+    build()  # warm up
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    kept = [build() for _ in range(COPIES)]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return (end - start) // COPIES
+
+
+def run(iterations: int) -> list[dict[str, Any]]:
+    data = {
+        "dict_like_list": [{"name": f"item_{i}"} for i in range(100)],
+        "list_of_strings": [f"string_{i}" for i in range(100)],
+    }
+    settings = ExampleSettings(**data)
+    snapshot = compile_snapshot(settings)
+
+    def read_model():
+        settings.folder_type
+        settings.grouped_settings.favorite_color
+        settings.nested_settings.model1.something
+        # Without a snapshot, colors are normalized by the reader
+        normalize_color(settings.colors.rgba_uint8, "uint8")
+
+    def read_snapshot():
+        snapshot.folder_type
+        snapshot.grouped_settings.favorite_color
+        snapshot.nested_settings.model1.something
+        snapshot.colors.normalized["rgba_uint8"]
+
+    results = []
+    for variant, read, build in (
+        ("model", read_model, lambda: ExampleSettings(**data)),
+        ("snapshot", read_snapshot, lambda: compile_snapshot(settings)),
+    ):
+        result = measure("hot path read", read, iterations, variant=variant)
+        result["retained_bytes"] = retained_bytes(build)
+        results.append(result)
+
+    results.append(
+        measure("compile_snapshot", lambda: compile_snapshot(settings), iterations // 100)
+    )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--output", help="Write results to a JSON file")
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    for result in results:
+        print_result(result)
+    if args.output:
+        write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+
+"""Offline benchmark suite for the server part of the addon.
+
+Runs the addon endpoints, event handlers and settings enum resolvers
+against the stand-in services from `benchmarks/fakes.py` at several
+synthetic data sizes. Run from the repository root:
+
+    python -m benchmarks.suite --output bench_results.json
+    python -m benchmarks.suite --compare bench_results.json
+
+Results are written as JSON, so runs can be compared later.
+"""
+
+import argparse
+import asyncio
+from typing import Any
+
+from benchmarks import fakes
+from benchmarks.common import (
+    compare_results,
+    measure_async,
+    print_result,
+    write_results,
+)
+
+fakes.install()
+
+from server import ExampleAddon  # noqa: E402
+from server.enums import invalidate_enums  # noqa: E402
+from server.settings import (  # noqa: E402
+    async_enum_resolver,
+    enum_resolver,
+    recursive_enum_resolver,
+)
+
+PROJECT_NAME = "bench"
+
+
+async def bench_endpoints(size: int, iterations: int) -> list[dict[str, Any]]:
+    db = fakes.FakePostgres.db
+    db.projects.clear()
+    # Each size gets its own project, so estimates of the folder
+    # count cached by the addon match the project
+    project_name = f"{PROJECT_NAME}_{size}"
+    db.add_project(project_name, size)
+
+    addon = ExampleAddon()
+    user = fakes.FakeUserEntity()
+
+    async def get_random_folder():
+        await addon.get_random_folder(user, project_name)
+
+    async def get_random_folders():
+        await addon.get_random_folders(user, project_name, count=10)
+
+    return [
+        await measure_async(
+            "get_random_folder", get_random_folder, iterations, folders=size
+        ),
+        await measure_async(
+            "get_random_folders[10]", get_random_folders, iterations, folders=size
+        ),
+    ]
+
+
+async def bench_event_handlers(size: int, iterations: int) -> list[dict[str, Any]]:
+    addon = ExampleAddon()
+    events = [
+        fakes.FakeEventModel(
+            "entity.task.status_changed",
+            description=f"Task {i} status changed",
+            project=PROJECT_NAME,
+        )
+        for i in range(size)
+    ]
+    settings_event = fakes.FakeEventModel(
+        "settings.changed",
+        project=PROJECT_NAME,
+        summary={"addon_name": addon.name, "variant": "production"},
+    )
+
+    async def enqueue():
+        for event in events:
+            await addon.on_task_status_changed(event)
+        # Do not let the queue overflow between iterations
+        await addon._task_status_batcher.stop()
+
+    async def handle_batch():
+        await addon.on_task_status_changed_batch(events)
+
+    async def on_settings_event():
+        await addon.on_settings_event(settings_event)
+
+    return [
+        await measure_async(
+            "on_task_status_changed", enqueue, iterations, events=size
+        ),
+        await measure_async(
+            "on_task_status_changed_batch", handle_batch, iterations, events=size
+        ),
+        await measure_async(
+            "on_settings_event", on_settings_event, iterations, events=size
+        ),
+    ]
+
+
+async def bench_enum_resolvers(size: int, iterations: int) -> list[dict[str, Any]]:
+    db = fakes.FakePostgres.db
+    db.projects.clear()
+    for i in range(size):
+        db.add_project(f"project_{i}", 0)
+    # The project list is cached, drop the one from the previous size
+    invalidate_enums("entity.project.created")
+    addon = ExampleAddon()
+
+    async def run_async_enum_resolver():
+        await async_enum_resolver()
+
+    async def run_enum_resolver():
+        enum_resolver()
+
+    async def run_recursive_enum_resolver():
+        await recursive_enum_resolver(addon, project_name="project_0")
+
+    return [
+        await measure_async(
+            "async_enum_resolver", run_async_enum_resolver, iterations, projects=size
+        ),
+        await measure_async(
+            "enum_resolver", run_enum_resolver, iterations, projects=size
+        ),
+        await measure_async(
+            "recursive_enum_resolver",
+            run_recursive_enum_resolver,
+            iterations,
+            projects=size,
+        ),
+    ]
+
+
+async def run(sizes: list[int], iterations: int) -> list[dict[str, Any]]:
+    results = []
+    for size in sizes:
+        results.extend(await bench_endpoints(size * 100, iterations))
+        results.extend(await bench_event_handlers(size, iterations))
+        results.extend(await bench_enum_resolvers(size, iterations))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10, 100, 1000],
+        help="Synthetic data sizes (events, projects; folders are 100x)",
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Results of a previous run")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.sizes, args.iterations))
+    for result in results:
+        print_result(result)
+    if args.compare:
+        compare_results(args.compare, results)
+    write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,39 @@
-from typing import Type
+import functools
+import uuid
+from typing import Any, Type
 
+from fastapi import Body, Query
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from nxtools import logging
 
+from ayon_server.access.utils import folder_access_list
 from ayon_server.addons import BaseServerAddon
 from ayon_server.api.dependencies import CurrentUser, ProjectName
 from ayon_server.entities import FolderEntity
 from ayon_server.events import EventStream, EventModel
-from ayon_server.exceptions import NotFoundException
+from ayon_server.exceptions import BadRequestException, NotFoundException
 from ayon_server.lib.postgres import Postgres
+from ayon_server.utils import json_dumps
 
 
+from .access import ACCESS_TOPICS, FOLDER_HIERARCHY_TOPICS, FolderAccessCache
+from .batching import EventBatcher
+from .cache import LRUCache, SingleFlightCache
+from .enums import enum_invalidation_topics, invalidate_enums
+from .folders import (
+    get_random_folder_id,
+    get_random_folder_ids,
+    iterate_folders,
+    load_folders,
+)
+from .invalidation import EventStreamBus, InvalidationBus
+from .metrics import MetricsRegistry
+from .queries import project_schema
+from .schema import get_cached_schema
 from .settings import ExampleSettings
+from .settings_diff import SettingsChangeNotifier, diff_settings
+from .sites import SiteSettingsResolver, fetch_site_overrides
+from .snapshot import ExampleSettingsSnapshot, compile_snapshot
 from .site_settings import ExampleSiteSettings
 
 
@@ -32,13 +55,206 @@ class ExampleAddon(BaseServerAddon):
 
     def initialize(self):
         logging.info("Example addon INIT")
+
+        # Incremented on every settings change. Values derived from
+        # settings (e.g. enums) are memoized per revision.
+
+        self.settings_revision = 0
+
+        # Resolved project settings are cached per (project_name, variant),
+        # so request handlers don't have to resolve and validate
+        # the whole settings model on every request.
+
+        self._project_settings_cache: LRUCache[
+            tuple[str, str], ExampleSettings
+        ] = LRUCache(maxsize=256)
+
+        # Read-only snapshots of the cached project settings
+        # for hot paths (see get_project_settings_snapshot)
+
+        self._project_snapshots: LRUCache[
+            tuple[str, str], ExampleSettingsSnapshot
+        ] = LRUCache(maxsize=256)
+
+        # Merged site settings layers per (project_name, variant).
+        # Sites are merged again only when their overrides change.
+
+        self._site_resolvers: LRUCache[
+            tuple[str, str], SiteSettingsResolver
+        ] = LRUCache(maxsize=64)
+
+        # Studio setting values used by event handlers,
+        # keyed by (variant, dotted path)
+
+        self._studio_values: SingleFlightCache[
+            tuple[str, str], Any
+        ] = SingleFlightCache()
+
+        # Consumers of studio settings may subscribe to changes
+        # of specific settings paths (per variant)
+
+        self._studio_changes: dict[str, SettingsChangeNotifier] = {}
+        self._studio_subscriptions: set[tuple[str, str]] = set()
+
+        # Read access decisions (and the resulting user projections)
+        # of folders returned by get_random_folder
+
+        self._folder_access = FolderAccessCache(maxsize=10_000, ttl=60.0)
+
+        # Caches above are invalidated in all server processes together.
+        # Other buses (e.g. LocalBus) may be set using set_invalidation_bus
+
+        self.set_invalidation_bus(
+            EventStreamBus(f"addon.{self.name}.cache_invalidated")
+        )
+
+        self._init_metrics()
+
         self.add_endpoint(
             "get-random-folder/{project_name}",
             self.get_random_folder,
             method="GET",
         )
+        self.add_endpoint(
+            "get-random-folders/{project_name}",
+            self.get_random_folders,
+            method="GET",
+        )
+        self.add_endpoint(
+            "list-folders/{project_name}",
+            self.list_folders,
+            method="GET",
+        )
+        self.add_endpoint(
+            "settings-schema",
+            self.get_settings_schema,
+            method="GET",
+        )
+        self.add_endpoint(
+            "site-settings-schema",
+            self.get_site_settings_schema,
+            method="GET",
+        )
+        self.add_endpoint(
+            "site-settings/{project_name}",
+            self.get_bulk_site_settings,
+            method="POST",
+        )
+        self.add_endpoint(
+            "metrics",
+            self.get_metrics,
+            method="GET",
+        )
+
+        # Task status changes tend to come in storms (e.g. during publishing)
+        # so they are buffered and processed in batches
+
+        self._task_status_batcher = EventBatcher(
+            self.on_task_status_changed_batch,
+            max_batch_size=500,
+            max_delay=1.0,
+            max_queue_size=10_000,
+            overflow="drop_oldest",
+            on_batch=functools.partial(
+                self._observe_batch, handler="task_status_changed"
+            ),
+        )
 
         EventStream.subscribe("entity.task.status_changed", self.on_task_status_changed)
+        EventStream.subscribe("settings.changed", self.on_settings_event)
+        for topic in FOLDER_HIERARCHY_TOPICS:
+            EventStream.subscribe(topic, self.on_folder_hierarchy_changed)
+        for topic in ACCESS_TOPICS:
+            EventStream.subscribe(topic, self.on_access_changed)
+        for topic in enum_invalidation_topics():
+            EventStream.subscribe(topic, self.on_enum_source_changed)
+
+    def _init_metrics(self):
+        self.metrics = MetricsRegistry(prefix="ayon_example_")
+        self._endpoint_duration = self.metrics.histogram(
+            "endpoint_duration_seconds",
+            "Duration of addon endpoint requests",
+        )
+        self._phase_duration = self.metrics.histogram(
+            "endpoint_phase_duration_seconds",
+            "Time spent in SQL, entity loading and access checks",
+        )
+        self._event_count = self.metrics.counter(
+            "events_total",
+            "Number of events handled",
+        )
+        self._event_duration = self.metrics.histogram(
+            "event_handler_duration_seconds",
+            "Duration of event handlers",
+        )
+
+        cache_hit_ratio = self.metrics.gauge(
+            "cache_hit_ratio",
+            "Ratio of cache lookups served from the cache",
+        )
+        cache_hit_ratio.set_function(
+            lambda: self._project_settings_cache.hit_ratio,
+            cache="project_settings",
+        )
+        cache_hit_ratio.set_function(
+            lambda: self._project_snapshots.hit_ratio,
+            cache="project_snapshots",
+        )
+        cache_hit_ratio.set_function(
+            lambda: self._studio_values.hit_ratio,
+            cache="studio_values",
+        )
+        cache_hit_ratio.set_function(
+            lambda: self._folder_access.hit_ratio,
+            cache="folder_access",
+        )
+
+        invalidations = self.metrics.counter(
+            "cache_invalidations_total",
+            "Number of cache invalidations exchanged with other processes",
+        )
+        invalidations.set_function(
+            lambda: self._invalidation.sent,
+            direction="sent",
+        )
+        invalidations.set_function(
+            lambda: self._invalidation.received,
+            direction="received",
+        )
+
+        queue_depth = self.metrics.gauge(
+            "event_queue_depth",
+            "Number of events waiting to be processed",
+        )
+        queue_depth.set_function(
+            lambda: self._task_status_batcher.queue_depth,
+            handler="task_status_changed",
+        )
+
+        self._batch_latency = self.metrics.histogram(
+            "event_batch_latency_seconds",
+            "Time from queueing the first event of a batch until it is processed",
+        )
+        self._batch_size = self.metrics.histogram(
+            "event_batch_size",
+            "Number of events in processed batches",
+            buckets=(1, 10, 50, 100, 250, 500, 1000),
+        )
+
+        batched_events = self.metrics.counter(
+            "batched_events_total",
+            "Number of events passed through the batching queue",
+        )
+        for state in ("received", "dropped", "processed", "failed"):
+            batched_events.set_function(
+                lambda state=state: getattr(self._task_status_batcher, state),
+                handler="task_status_changed",
+                state=state,
+            )
+
+    def _observe_batch(self, size: int, latency: float, handler: str) -> None:
+        self._batch_latency.observe(latency, handler=handler)
+        self._batch_size.observe(size, handler=handler)
 
     async def setup(self):
         pass
@@ -61,53 +277,362 @@ class ExampleAddon(BaseServerAddon):
     ):
         """Return a random folder from the database"""
 
-        settings = await self.get_project_settings(project_name)
-        assert settings is not None  # Keep mypy happy
+        endpoint = "get-random-folder"
+        with self._endpoint_duration.time(endpoint=endpoint):
+            settings = await self.get_project_settings_snapshot(project_name)
+
+            # Get a random folder id from the project
+            try:
+                with self._phase_duration.time(endpoint=endpoint, phase="sql"):
+                    folder_id = await get_random_folder_id(
+                        project_name,
+                        settings.folder_type,
+                    )
+            except Postgres.UndefinedTableError:
+                raise NotFoundException(f"Project {project_name} not found")
+
+            if folder_id is None:
+                raise NotFoundException("No folder found")
+
+            # Load the folder entity
+
+            with self._phase_duration.time(endpoint=endpoint, phase="load"):
+                folder = await FolderEntity.load(project_name, folder_id)
+
+            # ensure_read_access method raises ForbiddenException, when the user
+            # does not have rights to view the folder.
+            # FolderEntity.as_user returns the folder (similarly to folder.payload)
+            # but it respects the user access level (so it may hide certain attributes)
+            # Both are memoized per user and folder revision.
+
+            with self._phase_duration.time(endpoint=endpoint, phase="access"):
+                return await self._folder_access.as_user(folder, user)
+
+    async def get_random_folders(
+        self,
+        user: CurrentUser,
+        project_name: ProjectName,
+        count: int = Query(10, ge=1, le=1000, description="Number of folders"),
+    ) -> list[dict[str, Any]]:
+        """Return a list of distinct random folders from the database
+
+        This is the batch version of get-random-folder. Folders the user
+        is not allowed to read are skipped, so the result may contain
+        less than `count` items.
+        """
+
+        endpoint = "get-random-folders"
+        with self._endpoint_duration.time(endpoint=endpoint):
+            settings = await self.get_project_settings_snapshot(project_name)
+
+            try:
+                with self._phase_duration.time(endpoint=endpoint, phase="sql"):
+                    folder_ids = await get_random_folder_ids(
+                        project_name,
+                        settings.folder_type,
+                        count,
+                    )
+            except Postgres.UndefinedTableError:
+                raise NotFoundException(f"Project {project_name} not found")
 
-        # Get a random folder id from the project
+            # load_folders loads all the entities in one query and
+            # filters out the ones the user does not have access to,
+            # so loading and access checks are a single phase here
+
+            with self._phase_duration.time(endpoint=endpoint, phase="load"):
+                folders = await load_folders(project_name, folder_ids, user)
+            return [folder.as_user(user) for folder in folders]
+
+    async def list_folders(
+        self,
+        user: CurrentUser,
+        project_name: ProjectName,
+        after: str | None = Query(
+            None,
+            description="Return only folders with id greater than this one",
+        ),
+        limit: int | None = Query(None, ge=1),
+    ) -> StreamingResponse:
+        """Stream all folders of the configured type as NDJSON
+
+        Each line contains one folder (as returned by folder.as_user).
+        Folders are ordered by id, so an interrupted download may be
+        resumed by passing the id of the last received folder
+        in the `after` argument.
+        """
+
+        # Everything which may fail is done before the response starts,
+        # so errors are reported with their status code instead of
+        # a truncated stream
+
+        if after is not None:
+            try:
+                after = uuid.UUID(after).hex
+            except ValueError:
+                raise BadRequestException(f"Invalid folder id {after!r}")
+        project_schema(project_name)
+
+        settings = await self.get_project_settings_snapshot(project_name)
+        access_list = await folder_access_list(user, project_name, "read")
+        folders = iterate_folders(
+            project_name,
+            settings.folder_type,
+            access_list,
+            after=after,
+            limit=limit,
+        )
         try:
-            result = await Postgres.fetch(
-                f"""
-                SELECT id FROM project_{project_name}.folders
-                WHERE folder_type = $1
-                ORDER BY RANDOM() LIMIT 1
-                """,
-                settings.folder_type,
-            )
+            first = await anext(folders, None)
         except Postgres.UndefinedTableError:
             raise NotFoundException(f"Project {project_name} not found")
 
-        try:
-            folder_id = result[0]["id"]
-        except IndexError:
-            raise NotFoundException("No folder found")
+        async def generate():
+            if first is None:
+                return
+            chunk = [json_dumps(first.as_user(user)) + "\n"]
+            async for folder in folders:
+                chunk.append(json_dumps(folder.as_user(user)) + "\n")
+                if len(chunk) >= 100:
+                    yield "".join(chunk)
+                    chunk = []
+            if chunk:
+                yield "".join(chunk)
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+    async def get_settings_schema(
+        self,
+        user: CurrentUser,
+        variant: str = Query("production"),
+        project_name: str | None = Query(None),
+    ) -> Response:
+        """Return JSON schema of the addon settings
+
+        This is for clients of the addon (e.g. pipeline tools), which
+        need the schema with enums resolved. The server settings UI
+        does not use it, the server generates the schema for it itself.
+
+        The static part of the schema is generated and serialized once
+        per addon version, only the dynamic enumerators are resolved
+        and serialized per request.
+        """
+        cached = await get_cached_schema(self.name, self.version, ExampleSettings)
+        content = await cached.resolve_json(
+            {
+                "addon": self,
+                "project_name": project_name,
+                "settings_variant": variant,
+                "user_name": user.name,
+            }
+        )
+        return Response(content, media_type="application/json")
+
+    async def get_site_settings_schema(
+        self,
+        user: CurrentUser,
+        variant: str = Query("production"),
+    ) -> Response:
+        """Return JSON schema of the addon site settings
+
+        See get_settings_schema.
+        """
+        cached = await get_cached_schema(self.name, self.version, ExampleSiteSettings)
+        content = await cached.resolve_json(
+            {
+                "addon": self,
+                "settings_variant": variant,
+                "user_name": user.name,
+            }
+        )
+        return Response(content, media_type="application/json")
+
+    async def get_bulk_site_settings(
+        self,
+        user: CurrentUser,
+        project_name: ProjectName,
+        site_ids: list[str] = Body(..., embed=True, max_items=10_000),
+        variant: str = Query("production"),
+    ) -> dict[str, Any]:
+        """Return effective site settings of many sites at once
+
+        The response contains the values shared by all the sites
+        (`defaults`) and, for each requested site, only the values
+        which the site overrides.
+        """
+        settings = await self.get_cached_project_settings(project_name, variant)
+        overrides = await fetch_site_overrides(
+            project_name,
+            self.name,
+            self.version,
+            user.name,
+            site_ids,
+        )
+        key = (project_name, variant)
+        if (resolver := self._site_resolvers.get(key)) is None:
+            resolver = SiteSettingsResolver(ExampleSiteSettings)
+            self._site_resolvers.set(key, resolver)
+        return {
+            "project_name": project_name,
+            **resolver.resolve(settings, user.name, overrides),
+        }
+
+    async def get_metrics(self, user: CurrentUser) -> PlainTextResponse:
+        """Return addon metrics in Prometheus text format"""
+        return PlainTextResponse(
+            self.metrics.render(),
+            media_type="text/plain; version=0.0.4",
+        )
+
+    #
+    # Settings cache
+    #
 
-        # Load the folder entity
+    async def get_cached_project_settings(
+        self,
+        project_name: str,
+        variant: str = "production",
+    ) -> ExampleSettings:
+        """Return project settings, using the cache when possible.
+
+        The cache is invalidated in on_settings_changed and when
+        a settings.changed event is received.
+        """
+        key = (project_name, variant)
+        settings = self._project_settings_cache.get(key)
+        if settings is None:
+            # Settings may change while they are being loaded. Such
+            # settings are returned, but not cached.
+            version = self._invalidation.version("settings")
+            settings = await self.get_project_settings(project_name, variant=variant)
+            assert settings is not None  # Keep mypy happy
+            if not self._invalidation.is_stale("settings", version):
+                self._project_settings_cache.set(key, settings)
+        return settings
+
+    async def get_project_settings_snapshot(
+        self,
+        project_name: str,
+        variant: str = "production",
+    ) -> ExampleSettingsSnapshot:
+        """Return a read-only snapshot of the project settings.
+
+        Snapshots are cheaper to keep and read than the settings models
+        and may be shared, so use them in request and event handlers
+        which only read the settings.
+        """
+        key = (project_name, variant)
+        snapshot = self._project_snapshots.get(key)
+        if snapshot is None:
+            version = self._invalidation.version("settings")
+            settings = await self.get_cached_project_settings(project_name, variant)
+            snapshot = compile_snapshot(settings)
+            if not self._invalidation.is_stale("settings", version):
+                self._project_snapshots.set(key, snapshot)
+        return snapshot
+
+    def invalidate_project_settings(
+        self,
+        project_name: str | None = None,
+        variant: str | None = None,
+    ) -> None:
+        """Drop cached project settings.
 
-        folder = await FolderEntity.load(project_name, folder_id)
+        Studio settings are the base of all project settings, so when
+        project_name is not specified, all projects are invalidated.
+        """
+        self.settings_revision += 1
+
+        def match(key: tuple[str, str]) -> bool:
+            if project_name is not None and key[0] != project_name:
+                return False
+            if variant is not None and key[1] != variant:
+                return False
+            return True
+
+        self._project_settings_cache.pop_matching(match)
+        self._project_snapshots.pop_matching(match)
+
+    #
+    # Cross-process cache invalidation
+    #
+
+    def set_invalidation_bus(self, bus: InvalidationBus) -> None:
+        """Use the bus to invalidate caches of all server processes."""
+        bus.subscribe("settings", self._on_settings_invalidated)
+        bus.subscribe("folder_access", self._on_folder_access_invalidated)
+        bus.subscribe("enums", self._on_enums_invalidated)
+        self._invalidation = bus
+
+    async def _on_settings_invalidated(self, data: dict[str, Any]) -> None:
+        project_name = data.get("project_name")
+        variant = data.get("variant")
+        self.invalidate_project_settings(project_name, variant)
 
-        # ensure_read_access method raises ForbiddenException, when the user
-        # does not have rights to view the folder.
+        # Only cached studio values depending on the changed paths
+        # are reloaded on the next access. Project overrides do not
+        # affect them. Invalidations without the changed paths
+        # (settings.changed events) may have changed anything.
+        if project_name is None:
+            changed = data.get("changed") or [""]
+            for notifier_variant, notifier in list(self._studio_changes.items()):
+                if variant is None or variant == notifier_variant:
+                    await notifier.notify(changed)
 
-        await folder.ensure_read_access(user)
+    async def _on_folder_access_invalidated(self, data: dict[str, Any]) -> None:
+        self._folder_access.invalidate(project_name=data.get("project_name"))
 
-        # FolderEntity.as_user returns the folder (similarly to folder.payload)
-        # but it respects the user access level (so it may hide certain attributes)
-        return folder.as_user(user)
+    async def _on_enums_invalidated(self, data: dict[str, Any]) -> None:
+        invalidate_enums(data["topic"])
 
     #
     # Event handlers
     #
 
-    async def get_cached_setting(self) -> str:
+    async def get_cached_setting(
+        self,
+        path: str = "grouped_settings.favorite_color",
+        variant: str = "production",
+    ) -> Any:
         """
-        We use this setting in a event handler so it is a good idea
-        to cache it for better performance.
+        We use studio settings in event handlers so it is a good idea
+        to cache them for better performance.
+
+        `path` is a dotted path to the setting, e.g.
+        "grouped_settings.favorite_color". When many handlers miss
+        the cache at the same time, the settings are loaded only once.
         """
-        if not hasattr(self, "_cached_setting") or self._cached_setting is None:
-            studio_settings = await self.get_studio_settings()
-            self._cached_setting = studio_settings.grouped_settings.favorite_color
-        return self._cached_setting
+
+        key = (variant, path)
+
+        async def load() -> Any:
+            value: Any = await self.get_studio_settings(variant=variant)
+            for name in path.split("."):
+                value = getattr(value, name)
+            logging.debug(f"Example addon loaded studio setting {path}")
+            if key not in self._studio_subscriptions:
+                # Invalidate the value only when its path changes
+                self.studio_settings_changes(variant).subscribe(
+                    path, lambda _: self._studio_values.invalidate(key)
+                )
+                self._studio_subscriptions.add(key)
+            return value
+
+        return await self._studio_values.get(key, load)
+
+    def studio_settings_changes(self, variant: str) -> SettingsChangeNotifier:
+        """Return notifier of studio settings changes of the variant.
+
+        Subscribe to a settings path to get notified when it
+        (or anything it contains) changes, e.g.:
+
+            addon.studio_settings_changes("production").subscribe(
+                "grouped_settings.favorite_color", callback
+            )
+        """
+        if (notifier := self._studio_changes.get(variant)) is None:
+            notifier = SettingsChangeNotifier()
+            self._studio_changes[variant] = notifier
+        return notifier
 
     async def on_settings_changed(
         self,
@@ -117,15 +642,66 @@ class ExampleAddon(BaseServerAddon):
     ) -> None:
         """
         This method is called when the settings are changed.
-        We update the cached setting here.
+        We invalidate the cached settings here.
         """
-        new_favorite_color = new_settings.grouped_settings.favorite_color
-        logging.debug(
-            f"Example addon settings changed. New favorite color is {new_favorite_color}"
+        project_name = kwargs.get("project_name")
+        variant = kwargs.get("variant")
+
+        if old_settings is None:
+            changed = [""]
+        else:
+            changed = diff_settings(old_settings, new_settings)
+            if not changed:
+                return
+        logging.debug(f"Example addon settings changed: {', '.join(changed)}")
+
+        await self._invalidation.publish(
+            "settings",
+            {"project_name": project_name, "variant": variant, "changed": changed},
         )
-        self._cached_setting = new_favorite_color
+
+    async def on_settings_event(self, event: EventModel):
+        """Invalidate cached settings when settings are saved.
+
+        on_settings_changed is called only for changes made through
+        this addon instance, settings.changed events also cover
+        project overrides saved elsewhere.
+        """
+        self._event_count.inc(handler="settings_changed")
+        summary = event.summary or {}
+        if summary.get("addon_name", self.name) != self.name:
+            return
+        await self._invalidation.publish(
+            "settings",
+            {
+                "project_name": event.project or summary.get("project_name"),
+                "variant": summary.get("variant"),
+            },
+        )
+
+    async def on_folder_hierarchy_changed(self, event: EventModel):
+        self._event_count.inc(handler="folder_hierarchy_changed")
+        await self._invalidation.publish(
+            "folder_access", {"project_name": event.project}
+        )
+
+    async def on_access_changed(self, event: EventModel):
+        self._event_count.inc(handler="access_changed")
+        await self._invalidation.publish("folder_access")
+
+    async def on_enum_source_changed(self, event: EventModel):
+        self._event_count.inc(handler="enum_source_changed")
+        await self._invalidation.publish("enums", {"topic": event.topic})
 
     async def on_task_status_changed(self, event: EventModel):
-        favorite_color = await self.get_cached_setting()
-        logging.debug(f"Example addon says, that {event.description}")
-        logging.debug(f"Admin's favorite color is {favorite_color}")
+        self._event_count.inc(handler="task_status_changed")
+        await self._task_status_batcher.put(event)
+
+    async def on_task_status_changed_batch(self, events: list[EventModel]):
+        handler = "task_status_changed_batch"
+        self._event_count.inc(len(events), handler=handler)
+        with self._event_duration.time(handler=handler):
+            favorite_color = await self.get_cached_setting()
+            for event in events:
+                logging.debug(f"Example addon says, that {event.description}")
+            logging.debug(f"Admin's favorite color is {favorite_color}")
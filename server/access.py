@@ -0,0 +1,94 @@
+"""Memoized folder access decisions."""
+
+from typing import Any, cast
+
+from ayon_server.entities import FolderEntity, UserEntity
+from ayon_server.exceptions import ForbiddenException
+
+from .cache import TTLCache
+
+# Changes of these folder events may change the hierarchy paths
+# (and therefore access) of the folder and all its descendants.
+FOLDER_HIERARCHY_TOPICS = (
+    "entity.folder.deleted",
+    "entity.folder.renamed",
+    "entity.folder.parent_changed",
+)
+
+# Changes of access groups or users may change the access of any user.
+ACCESS_TOPICS = (
+    "access_group.created",
+    "access_group.updated",
+    "access_group.deleted",
+    "entity.user.deleted",
+    "entity.user.data_changed",
+    "entity.user.access_groups_changed",
+)
+
+_DENIED = object()
+
+
+class FolderAccessCache:
+    """Cache of read access decisions and user projections of folders.
+
+    Entries are keyed by (user, project, folder id, folder revision).
+    The revision is the folder's update time, so a modified folder
+    never hits an outdated entry. Changes which affect access without
+    touching the folder itself (hierarchy and access group changes)
+    have to be reported using the invalidate methods.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 60.0):
+        self._cache: TTLCache[tuple[str, str, str, Any], Any] = TTLCache(
+            maxsize=maxsize, ttl=ttl
+        )
+
+    @property
+    def hit_ratio(self) -> float:
+        return self._cache.hit_ratio
+
+    def stats(self) -> dict[str, Any]:
+        return self._cache.stats()
+
+    async def as_user(self, folder: FolderEntity, user: UserEntity) -> dict[str, Any]:
+        """Check the read access and return the folder as the user sees it.
+
+        This is a cached equivalent of calling `folder.ensure_read_access`
+        followed by `folder.as_user`. Raises ForbiddenException when the
+        user is not allowed to read the folder.
+
+        The returned dictionary is shared, so it must not be modified.
+        """
+        key = (user.name, folder.project_name, folder.id, folder.updated_at)
+        result = self._cache.get(key)
+        if result is None:
+            try:
+                await folder.ensure_read_access(user)
+            except ForbiddenException:
+                result = _DENIED
+            else:
+                result = folder.as_user(user)
+            self._cache.set(key, result)
+
+        if result is _DENIED:
+            raise ForbiddenException("You do not have access to this folder")
+        return cast(dict[str, Any], result)
+
+    def invalidate(
+        self,
+        project_name: str | None = None,
+        user_name: str | None = None,
+    ) -> None:
+        """Drop decisions of a project and/or user. Drop all by default."""
+        if project_name is None and user_name is None:
+            self._cache.clear()
+            return
+
+        def match(key: tuple[str, str, str, Any]) -> bool:
+            if user_name is not None and key[0] != user_name:
+                return False
+            if project_name is not None and key[1] != project_name:
+                return False
+            return True
+
+        self._cache.pop_matching(match)
@@ -0,0 +1,194 @@
+"""Micro-batching of events for the example addon event handlers."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Literal
+
+from nxtools import log_traceback
+
+from ayon_server.events import EventModel
+
+OverflowPolicy = Literal["block", "drop_oldest", "drop_newest"]
+
+
+class EventBatcher:
+    """Collect events and pass them to a handler in batches.
+
+    A batch is handed over when it reaches `max_batch_size` events or
+    `max_delay` seconds after its first event was queued, whatever
+    comes first.
+
+    The queue holds at most `max_queue_size` events. When it is full,
+    the overflow policy decides what happens with a new event:
+
+    - "block": put() waits until there is space (backpressure)
+    - "drop_oldest": the oldest queued event is dropped
+    - "drop_newest": the new event is dropped
+
+    `on_batch`, when provided, is called after each batch with its
+    size and latency (seconds from queueing its first event until
+    it was processed), e.g. to export them as metrics.
+
+    Events left in the queue are processed when the worker is stopped,
+    either by `stop()` or by cancelling it when the event loop
+    shuts down. A batch whose handler was interrupted by the
+    cancellation is handed over again.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[list[EventModel]], Awaitable[None]],
+        *,
+        max_batch_size: int = 500,
+        max_delay: float = 1.0,
+        max_queue_size: int = 10_000,
+        overflow: OverflowPolicy = "drop_oldest",
+        on_batch: Callable[[int, float], None] | None = None,
+    ):
+        self.handler = handler
+        self.on_batch = on_batch
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.overflow = overflow
+
+        self._queue: asyncio.Queue[tuple[float, EventModel] | None] = asyncio.Queue(
+            maxsize=max_queue_size
+        )
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+        self.received = 0
+        self.dropped = 0
+        self.processed = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_batch_size = 0
+        self.last_batch_latency = 0.0
+        self.max_batch_latency = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.is_running and not self._stopping:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the worker and process the events left in the queue.
+
+        The worker finishes the batch it is working on, then the events
+        queued after it are processed.
+        """
+        if self._task is not None:
+            self._stopping = True
+            try:
+                if self.is_running:
+                    # None tells the worker to stop after the current batch
+                    await self._queue.put(None)
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._stopping = False
+            self._task = None
+        await self._drain()
+
+    async def _drain(self) -> None:
+        while not self._queue.empty():
+            batch: list[tuple[float, EventModel]] = []
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not None:
+                    batch.append(item)
+            await self._process(batch)
+
+    async def put(self, event: EventModel) -> None:
+        # The worker is started lazily, because the addon is
+        # initialized before the event loop is running.
+        self.start()
+        self.received += 1
+        item = (time.monotonic(), event)
+
+        # The stop signal in the queue must not be dropped
+        if self.overflow == "block" or self._stopping:
+            await self._queue.put(item)
+            return
+
+        if self._queue.full():
+            self.dropped += 1
+            if self.overflow == "drop_newest":
+                return
+            self._queue.get_nowait()
+        self._queue.put_nowait(item)
+
+    async def _run(self) -> None:
+        batch: list[tuple[float, EventModel]] = []
+        try:
+            stopping = False
+            while not stopping:
+                item = await self._queue.get()
+                if item is None:
+                    break
+                batch.append(item)
+                deadline = item[0] + self.max_delay
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        async with asyncio.timeout(timeout):
+                            item = await self._queue.get()
+                    except TimeoutError:
+                        break
+                    if item is None:
+                        stopping = True
+                        break
+                    batch.append(item)
+                await self._process(batch)
+                batch = []
+        except asyncio.CancelledError:
+            # Cancelled when the event loop shuts down. The batch being
+            # collected or processed (from its start, as the handler was
+            # interrupted) and the queued events are processed now,
+            # so they are not lost.
+            await self._process(batch)
+            await self._drain()
+            raise
+
+    async def _process(self, batch: list[tuple[float, EventModel]]) -> None:
+        if not batch:
+            return
+        try:
+            await self.handler([event for _, event in batch])
+        except Exception:
+            self.failed += len(batch)
+            log_traceback(f"Failed to process a batch of {len(batch)} events")
+        else:
+            self.processed += len(batch)
+
+        # Latency is measured from queueing the first event of the batch
+        latency = time.monotonic() - batch[0][0]
+        self.batches += 1
+        self.last_batch_size = len(batch)
+        self.last_batch_latency = latency
+        self.max_batch_latency = max(self.max_batch_latency, latency)
+        if self.on_batch is not None:
+            self.on_batch(len(batch), latency)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth,
+            "received": self.received,
+            "dropped": self.dropped,
+            "processed": self.processed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_batch_size": self.last_batch_size,
+            "last_batch_latency": self.last_batch_latency,
+            "max_batch_latency": self.max_batch_latency,
+        }
@@ -0,0 +1,269 @@
+"""Small in-memory caches used by the example addon."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Dictionary-like cache with a bounded size.
+
+    When the cache is full, the least recently used item is evicted.
+    Lookups are counted, so the cache efficiency can be monitored.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._data
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        return self._data.pop(key, None)
+
+    def pop_matching(self, predicate: Callable[[K], bool]) -> int:
+        """Remove all items whose key matches the predicate.
+
+        Returns the number of removed items.
+        """
+        keys = [key for key in self._data if predicate(key)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+        }
+
+
+class TTLCache(LRUCache[K, V]):
+    """LRU cache where items also expire `ttl` seconds after being set."""
+
+    def __init__(self, maxsize: int = 128, ttl: float = 60.0):
+        super().__init__(maxsize)
+        self.ttl = ttl
+        self._expires: dict[K, float] = {}
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        expires = self._expires.get(key)
+        if expires is not None and expires < time.monotonic():
+            self.pop(key)
+        return super().get(key, default)
+
+    def set(self, key: K, value: V) -> None:
+        super().set(key, value)
+        self._expires[key] = time.monotonic() + self.ttl
+        # Evicted keys are removed from _expires lazily
+        if len(self._expires) > 2 * self.maxsize:
+            self._expires = {k: self._expires[k] for k in self._data}
+
+    def pop(self, key: K) -> V | None:
+        self._expires.pop(key, None)
+        return super().pop(key)
+
+    def pop_matching(self, predicate: Callable[[K], bool]) -> int:
+        count = super().pop_matching(predicate)
+        self._expires = {k: self._expires[k] for k in self._data}
+        return count
+
+    def clear(self) -> None:
+        super().clear()
+        self._expires.clear()
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # Retrieve the exception, so asyncio does not complain
+    # about it never being retrieved when nobody waits.
+    if not task.cancelled():
+        task.exception()
+
+
+class CachedValue(Generic[V]):
+    __slots__ = ("value", "loaded_at", "load_time")
+
+    def __init__(self, value: V, loaded_at: float, load_time: float):
+        self.value = value
+        self.loaded_at = loaded_at
+        self.load_time = load_time
+
+
+class SingleFlightCache(Generic[K, V]):
+    """Async cache where concurrent misses share a single load.
+
+    When many coroutines ask for the same missing key at once
+    (typically a burst of events right after startup or after
+    an invalidation), only the first one calls the loader.
+    The others wait for its result instead of loading in parallel.
+
+    For each cached value, time of the load and its duration
+    are recorded.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._values: dict[K, CachedValue[V]] = {}
+        self._inflight: dict[K, asyncio.Task[V]] = {}
+        # Incremented on every invalidation. A load that started
+        # before an invalidation must not store its (stale) result.
+        self._generation = 0
+
+    async def get(self, key: K, loader: Callable[[], Awaitable[V]]) -> V:
+        if (cached := self._values.get(key)) is not None:
+            self.hits += 1
+            return cached.value
+
+        if (task := self._inflight.get(key)) is not None:
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        self.misses += 1
+        # The loader runs in its own task, so cancelling the caller
+        # which started the load does not cancel it for the others
+        task = asyncio.create_task(self._load(key, loader, self._generation))
+        task.add_done_callback(_retrieve_exception)
+        self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _load(
+        self,
+        key: K,
+        loader: Callable[[], Awaitable[V]],
+        generation: int,
+    ) -> V:
+        start = time.monotonic()
+        try:
+            value = await loader()
+            if generation == self._generation:
+                now = time.monotonic()
+                self._values[key] = CachedValue(value, now, now - start)
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    def invalidate(self, key: K | None = None) -> None:
+        """Drop a cached value, or all of them when key is None."""
+        self._generation += 1
+        if key is None:
+            self._values.clear()
+            self._inflight.clear()
+        else:
+            self._values.pop(key, None)
+            self._inflight.pop(key, None)
+
+    @property
+    def hit_ratio(self) -> float:
+        # Coalesced lookups did not trigger a load, so they count as hits
+        total = self.hits + self.coalesced + self.misses
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+    def age(self, key: K) -> float | None:
+        """Return number of seconds since the value was loaded."""
+        if (cached := self._values.get(key)) is None:
+            return None
+        return time.monotonic() - cached.loaded_at
+
+    def load_time(self, key: K) -> float | None:
+        """Return number of seconds it took to load the value."""
+        if (cached := self._values.get(key)) is None:
+            return None
+        return cached.load_time
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._values),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+
+class DependencyMemo(Generic[K, V]):
+    """Memoize values derived from a revisioned source.
+
+    Each entry remembers the source revision it was computed for and
+    the values it depends on. When the revision changes, the caller
+    re-reads the dependencies, and the value is recomputed only when
+    they actually differ.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.recomputed = 0
+        self._entries: LRUCache[K, tuple[Any, tuple, V]] = LRUCache(maxsize)
+
+    @property
+    def hits(self) -> int:
+        return self._entries.hits
+
+    @property
+    def misses(self) -> int:
+        return self._entries.misses
+
+    def get(self, key: K, revision: Any) -> tuple[bool, V | None]:
+        """Return (True, value) when the entry is up to date."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == revision:
+            return True, entry[2]
+        return False, None
+
+    def update(
+        self,
+        key: K,
+        revision: Any,
+        dependencies: tuple,
+        compute: Callable[[], V],
+    ) -> V:
+        """Store the value for the revision, computing it if needed."""
+        entry = self._entries.pop(key)
+        if entry is not None and entry[1] == dependencies:
+            value = entry[2]
+        else:
+            value = compute()
+            self.recomputed += 1
+        self._entries.set(key, (revision, dependencies, value))
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,107 @@
+"""Cached default values for settings models.
+
+Settings models are instantiated on every settings resolve, and each
+instance builds its submodels and default lists through their
+`default_factory` again - creating and initializing the whole default
+tree from scratch.
+
+`cached_default` builds the default once and keeps it as a prototype,
+which is never handed out. For the prototype, a copy function is
+compiled, which creates a new instance of the tree without running
+the model initialization again. Immutable values (strings, numbers,
+tuples) are shared between the copies, only models, lists, dicts
+and sets are copied, so modifying one copy never affects another one
+or the prototype.
+
+`cached_default_field` also keeps the default in the JSON schema, as
+a static default would, for fields the settings UI offers defaults of.
+"""
+
+from typing import Any, Callable, TypeVar
+
+from pydantic import BaseModel, Field
+from pydantic.schema import encode_default
+
+T = TypeVar("T")
+
+
+def compile_copy(value: Any) -> Callable[[], Any] | None:
+    """Return a function creating a copy of the value.
+
+    Returns None when the value is immutable and may be shared.
+    """
+
+    if isinstance(value, BaseModel):
+        model_class = type(value)
+        fields_set = frozenset(value.__fields_set__)
+        items = [(key, item, compile_copy(item)) for key, item in value.__dict__.items()]
+
+        def copy_model() -> BaseModel:
+            # Same as BaseModel.construct does, but without
+            # resolving defaults and aliases of the fields
+            model = model_class.__new__(model_class)
+            values = {k: v if c is None else c() for k, v, c in items}
+            object.__setattr__(model, "__dict__", values)
+            object.__setattr__(model, "__fields_set__", set(fields_set))
+            model._init_private_attributes()
+            return model
+
+        return copy_model
+
+    if isinstance(value, list):
+        # Keep list subclasses (e.g. NamedList)
+        list_class = type(value)
+        list_items = [(item, compile_copy(item)) for item in value]
+        if list_class is list:
+            return lambda: [v if c is None else c() for v, c in list_items]
+        return lambda: list_class(v if c is None else c() for v, c in list_items)
+
+    if isinstance(value, dict):
+        dict_items = [(key, item, compile_copy(item)) for key, item in value.items()]
+        return lambda: {k: v if c is None else c() for k, v, c in dict_items}
+
+    if isinstance(value, set):
+        frozen = frozenset(value)
+        return lambda: set(frozen)
+
+    return None
+
+
+def cached_default(build: Callable[[], T]) -> Callable[[], T]:
+    """Return a default_factory copying a cached prototype.
+
+    `build` is called once, on first use, e.g.:
+
+        colors: Colors = Field(default_factory=cached_default(Colors))
+    """
+    copiers: list[Callable[[], Any]] = []
+
+    def factory() -> T:
+        if not copiers:
+            prototype = build()
+            copier = compile_copy(prototype)
+            copiers.append(copier if copier is not None else lambda: prototype)
+        return copiers[0]()
+
+    factory.build = build  # type: ignore[attr-defined]
+    return factory
+
+
+def cached_default_field(build: Callable[[], Any], **kwargs: Any) -> Any:
+    """Return a Field with a cached default, included in the JSON schema.
+
+    Fields with a default_factory have no default in the schema, e.g.:
+
+        items: list[Item] = cached_default_field(
+            lambda: [Item(name="default")],
+            title="Items",
+        )
+    """
+    factory = cached_default(build)
+    field = Field(default_factory=factory, **kwargs)
+    # Lists are encoded as plain lists (NamedList indexes submodels)
+    default = factory()
+    if isinstance(default, list):
+        default = list(default)
+    field.extra["default"] = encode_default(default)
+    return field
@@ -0,0 +1,74 @@
+"""Caching of settings enum resolvers.
+
+Enum resolvers run every time the settings form or schema is rendered.
+Resolvers which query the database can be wrapped with `cached_enum`
+to reuse their result for `ttl` seconds, or until one of the given
+event topics is received:
+
+    @cached_enum(ttl=300, invalidate_on=PROJECT_TOPICS)
+    async def project_names_enum():
+        ...
+
+The addon subscribes to the topics in its initialize method
+(see `enum_invalidation_topics`).
+"""
+
+import functools
+from typing import Any, Awaitable, Callable, Iterable
+
+from .cache import TTLCache
+
+PROJECT_TOPICS = (
+    "entity.project.created",
+    "entity.project.deleted",
+    "entity.project.renamed",
+)
+
+EnumResolver = Callable[..., Awaitable[Any]]
+
+# topic -> invalidate functions of resolvers depending on it
+_invalidators: dict[str, list[Callable[[], None]]] = {}
+
+
+def cached_enum(
+    ttl: float = 60.0,
+    invalidate_on: Iterable[str] = (),
+    maxsize: int = 64,
+) -> Callable[[EnumResolver], EnumResolver]:
+    """Cache results of an async enum resolver.
+
+    Results are cached per arguments, so a resolver accepting e.g.
+    `project_name` keeps a separate result for each project.
+    The wrapper keeps the signature of the resolver, so the server
+    passes it the same arguments as to the original function.
+    """
+
+    def decorator(func: EnumResolver) -> EnumResolver:
+        cache: TTLCache[tuple, Any] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = (args, tuple(sorted(kwargs.items())))
+            result = cache.get(key)
+            if result is None:
+                result = await func(*args, **kwargs)
+                cache.set(key, result)
+            return result
+
+        wrapper.invalidate = cache.clear  # type: ignore[attr-defined]
+        wrapper.cache = cache  # type: ignore[attr-defined]
+        for topic in invalidate_on:
+            _invalidators.setdefault(topic, []).append(cache.clear)
+        return wrapper
+
+    return decorator
+
+
+def enum_invalidation_topics() -> list[str]:
+    return list(_invalidators)
+
+
+def invalidate_enums(topic: str) -> None:
+    """Invalidate all cached enums depending on the given topic."""
+    for invalidate in _invalidators.get(topic, []):
+        invalidate()
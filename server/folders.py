@@ -0,0 +1,292 @@
+"""Folder queries used by the example addon endpoints."""
+
+from typing import Any, AsyncGenerator, Mapping
+
+from ayon_server.access.utils import folder_access_list
+from ayon_server.entities import FolderEntity, UserEntity
+from ayon_server.exceptions import NotFoundException
+
+from .cache import TTLCache
+from .queries import project_fetch, project_iterate
+
+
+# Number of rows a random pick samples. Only sampled folders
+# of the requested type are candidates, so the sample has to be
+# large enough to contain some of them even when the type is rare.
+SAMPLE_ROWS = 2000
+
+# Row count estimates of the folder tables, used to size the samples
+_row_estimates: TTLCache[str, float] = TTLCache(maxsize=1024, ttl=300.0)
+
+
+async def get_folder_count_estimate(project_name: str) -> float:
+    """Return the planner's estimate of the number of folders.
+
+    The estimate is read from the table statistics, so it is cheap,
+    but it is only as fresh as the last (auto)analyze.
+    Returns 0 when the table was never analyzed.
+
+    Raises NotFoundException when the project does not exist.
+    """
+    estimate = _row_estimates.get(project_name)
+    if estimate is None:
+        # Unlike a cast to regclass, which fails when the schema does not
+        # exist, to_regclass returns NULL for a missing table
+        result = await project_fetch(
+            project_name,
+            """
+            SELECT reltuples FROM pg_class
+            WHERE oid = to_regclass('{schema}.folders')
+            """,
+        )
+        if not result:
+            raise NotFoundException(f"Project {project_name} not found")
+        estimate = max(0.0, float(result[0]["reltuples"]))
+        _row_estimates.set(project_name, estimate)
+    return estimate
+
+
+def sample_percent(row_count: float, sample_rows: int) -> float:
+    """Return TABLESAMPLE percentage selecting about `sample_rows` rows."""
+    if row_count <= sample_rows:
+        return 100.0
+    return 100.0 * sample_rows / row_count
+
+
+async def get_random_folder_id(project_name: str, folder_type: str) -> str | None:
+    """Return an id of a random folder of the given type.
+
+    `ORDER BY RANDOM()` has to read every matching row, so its cost
+    grows with the size of the project. Instead, we read a random
+    sample of about SAMPLE_ROWS rows (`TABLESAMPLE SYSTEM` picks random
+    table pages) and pick a random folder of the type from the sample.
+    Only when the sample does not contain any (a small project or
+    a rare folder type), `ORDER BY RANDOM()` is used.
+
+    Folder ids are not used for the pick. They are uuid1, created
+    in bursts, so they are not spread evenly over the key space.
+
+    Whole pages are sampled, so folders sharing their page with fewer
+    folders of the same type are slightly more likely to be picked.
+    The bias decreases with the size of the sample.
+
+    Raises NotFoundException when the project does not exist.
+    Returns None when there is no folder of the given type.
+    """
+
+    row_count = await get_folder_count_estimate(project_name)
+
+    # UNION ALL is evaluated lazily - the second branch runs only
+    # when the first one does not produce a row.
+
+    result = await project_fetch(
+        project_name,
+        """
+        (
+            SELECT id FROM {schema}.folders TABLESAMPLE SYSTEM ($2)
+            WHERE folder_type = $1
+            ORDER BY RANDOM() LIMIT 1
+        )
+        UNION ALL
+        (
+            SELECT id FROM {schema}.folders
+            WHERE folder_type = $1
+            ORDER BY RANDOM() LIMIT 1
+        )
+        LIMIT 1
+        """,
+        folder_type,
+        sample_percent(row_count, SAMPLE_ROWS),
+    )
+    if not result:
+        return None
+    return result[0]["id"]
+
+
+async def get_random_folder_ids(
+    project_name: str,
+    folder_type: str,
+    count: int,
+) -> list[str]:
+    """Return up to `count` distinct ids of random folders of the given type.
+
+    This is the batch version of `get_random_folder_id`. Folders are
+    picked from a single sample of at least SAMPLE_ROWS rows (larger
+    for bigger counts, so the picks do not come from a handful of
+    pages). When the sample does not contain enough folders of the
+    type, the project is small (or the type is rare) and
+    `ORDER BY RANDOM()` is used directly.
+
+    Raises NotFoundException when the project does not exist.
+    """
+
+    row_count = await get_folder_count_estimate(project_name)
+    sample_rows = max(SAMPLE_ROWS, count * 20)
+    if row_count > sample_rows:
+        result = await project_fetch(
+            project_name,
+            """
+            SELECT id FROM {schema}.folders TABLESAMPLE SYSTEM ($2)
+            WHERE folder_type = $1
+            ORDER BY RANDOM() LIMIT $3
+            """,
+            folder_type,
+            sample_percent(row_count, sample_rows),
+            count,
+        )
+        if len(result) >= count:
+            return [row["id"] for row in result]
+
+    result = await project_fetch(
+        project_name,
+        """
+        SELECT id FROM {schema}.folders
+        WHERE folder_type = $1
+        ORDER BY RANDOM() LIMIT $2
+        """,
+        folder_type,
+        count,
+    )
+    return [row["id"] for row in result]
+
+
+async def load_folders(
+    project_name: str,
+    folder_ids: list[str],
+    user: UserEntity,
+) -> list[FolderEntity]:
+    """Load multiple folders the user is allowed to read.
+
+    This does the same as calling `FolderEntity.load` and
+    `ensure_read_access` for each id, but in a single query:
+    the user's folder access list is resolved once and applied
+    as a path filter, so folders the user cannot see are
+    silently skipped instead of raising ForbiddenException.
+    """
+
+    if not folder_ids:
+        return []
+
+    access_list = await folder_access_list(user, project_name, "read")
+    query, args = folder_query(project_name, access_list, ["f.id = ANY($3)"])
+
+    result = []
+    async for record in project_iterate(project_name, query, *args, folder_ids):
+        result.append(folder_from_record(project_name, record))
+    return result
+
+
+async def iterate_folders(
+    project_name: str,
+    folder_type: str,
+    access_list: list[str] | None,
+    after: str | None = None,
+    limit: int | None = None,
+) -> AsyncGenerator[FolderEntity, None]:
+    """Yield all folders of the given type matching the access list.
+
+    `access_list` is the user's folder access list, as returned
+    by `folder_access_list` (None means access to all folders).
+
+    Folders are ordered by id and fetched using a server-side cursor,
+    so they are never loaded in memory all at once. To resume an
+    interrupted iteration, pass the id of the last received folder
+    as `after`.
+
+    The query is sent when the first folder is requested, which
+    raises Postgres.UndefinedTableError when the project does not exist.
+    """
+
+    conditions = ["f.folder_type = $3"]
+    params: list[Any] = [folder_type]
+    if after is not None:
+        conditions.append("f.id > $4")
+        params.append(after)
+    query, args = folder_query(project_name, access_list, conditions)
+    query += " ORDER BY f.id"
+    if limit is not None:
+        params.append(limit)
+        query += f" LIMIT ${len(args) + len(params)}"
+
+    async for record in project_iterate(project_name, query, *args, *params):
+        yield folder_from_record(project_name, record)
+
+
+FOLDER_SELECT = """
+    SELECT
+        f.id AS id,
+        f.name AS name,
+        f.label AS label,
+        f.folder_type AS folder_type,
+        f.parent_id AS parent_id,
+        f.thumbnail_id AS thumbnail_id,
+        f.attrib AS own_attrib,
+        f.data AS data,
+        f.active AS active,
+        f.status AS status,
+        f.tags AS tags,
+        f.created_at AS created_at,
+        f.updated_at AS updated_at,
+        h.path AS path,
+        ia.attrib AS inherited_attrib,
+        p.attrib AS project_attrib
+    FROM {schema}.folders AS f
+    INNER JOIN {schema}.hierarchy AS h
+        ON f.id = h.id
+    LEFT JOIN {schema}.exported_attributes AS ia
+        ON f.parent_id = ia.folder_id
+    INNER JOIN public.projects AS p
+        ON p.name ILIKE $2
+"""
+
+
+def folder_query(
+    project_name: str,
+    access_list: list[str] | None,
+    conditions: list[str],
+) -> tuple[str, list[Any]]:
+    """Build a query selecting folders with everything FolderEntity needs.
+
+    The query is a template for `project_fetch`/`project_iterate`.
+
+    The returned query uses two placeholders ($1 for the access list
+    and $2 for the project name), so additional conditions must be
+    numbered from $3. Returned arguments should be followed by values
+    for these conditions.
+
+    When access_list is None, the user has access to all folders.
+    """
+
+    # The access list placeholder is always present, so the numbering
+    # of the following placeholders does not depend on the user.
+    if access_list is None:
+        conditions = ["$1::varchar[] IS NULL", *conditions]
+    else:
+        conditions = ["h.path LIKE ANY($1)", *conditions]
+    query = FOLDER_SELECT + "WHERE " + " AND ".join(conditions)
+    return query, [access_list, project_name]
+
+
+def folder_from_record(project_name: str, record: Mapping[str, Any]) -> FolderEntity:
+    """Create a FolderEntity from a row selected by `load_folders`.
+
+    Attributes are inherited the same way FolderEntity.load does it:
+    root folders inherit from the project, other folders from
+    their parent's exported attributes.
+    """
+
+    payload = dict(record)
+    own_attrib = payload.pop("own_attrib") or {}
+    inherited_attrib = payload.pop("inherited_attrib")
+    project_attrib = payload.pop("project_attrib")
+
+    attrib: dict[str, Any] = {}
+    if inherited_attrib is not None:
+        attrib.update(inherited_attrib)
+    elif payload["parent_id"] is None:
+        attrib.update(project_attrib or {})
+    attrib.update(own_attrib)
+
+    payload["attrib"] = attrib
+    payload["own_attrib"] = list(own_attrib.keys())
+    return FolderEntity.from_record(project_name=project_name, payload=payload)
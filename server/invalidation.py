@@ -0,0 +1,163 @@
+"""Cache invalidation shared by all server processes.
+
+The server may run several workers (and nodes), each with its own copy
+of the addon and its caches. Callbacks such as `on_settings_changed`
+are called only in the process which made the change, so caches have
+to be invalidated through a bus which delivers the invalidation to all
+the processes:
+
+- `EventStreamBus` uses the server messaging (EventStream events
+  handled on all nodes)
+- `LocalBus` connects buses within a single process, e.g. several
+  addon instances in tests and benchmarks
+
+Invalidations are grouped by namespace (e.g. "settings") and carry
+a free-form dictionary describing what changed. Every namespace has
+a version, which is incremented by each invalidation (sent or received)
+and carried by the messages, so a process can tell a value loaded
+before an invalidation was received is stale, without asking anyone:
+
+    version = bus.version("settings")
+    value = await load()
+    if bus.version("settings") == version:
+        cache.set(key, value)
+"""
+
+import abc
+import inspect
+import uuid
+from typing import Any, Awaitable, Callable
+
+from nxtools import logging
+
+from ayon_server.events import EventModel, EventStream
+
+InvalidationHandler = Callable[[dict[str, Any]], Awaitable[None] | None]
+
+
+class InvalidationBus(abc.ABC):
+    """Base class of invalidation buses.
+
+    Subclasses implement `_send`, which delivers the message to other
+    processes, and pass messages from other processes to `receive`.
+    """
+
+    def __init__(self):
+        self.node_id = uuid.uuid4().hex
+        self.sent = 0
+        self.received = 0
+        self._versions: dict[str, int] = {}
+        self._handlers: dict[str, list[InvalidationHandler]] = {}
+
+    def version(self, namespace: str) -> int:
+        """Return the latest known version of the namespace."""
+        return self._versions.get(namespace, 0)
+
+    def is_stale(self, namespace: str, version: int) -> bool:
+        """Check whether a value stamped with the version is outdated."""
+        return version < self.version(namespace)
+
+    def subscribe(self, namespace: str, handler: InvalidationHandler) -> None:
+        """Call `handler(data)` on every invalidation in the namespace.
+
+        Handlers are called for invalidations published by this process
+        as well as by the other ones.
+        """
+        self._handlers.setdefault(namespace, []).append(handler)
+
+    async def publish(self, namespace: str, data: dict[str, Any] | None = None) -> int:
+        """Invalidate the namespace in all processes.
+
+        Local handlers are called before the message is sent.
+        Returns the new version of the namespace.
+        """
+        version = self.version(namespace) + 1
+        message = {
+            "namespace": namespace,
+            "version": version,
+            "origin": self.node_id,
+            "data": data or {},
+        }
+        await self._apply(message)
+        try:
+            await self._send(message)
+        except Exception:
+            logging.error(f"Failed to send {namespace} cache invalidation")
+        else:
+            self.sent += 1
+        return version
+
+    async def receive(self, message: dict[str, Any]) -> None:
+        """Handle a message sent by another process."""
+        if message.get("origin") == self.node_id:
+            return
+        self.received += 1
+        await self._apply(message)
+
+    async def _apply(self, message: dict[str, Any]) -> None:
+        namespace = message["namespace"]
+        # Every invalidation advances the local version, even when the
+        # sender's version is behind (e.g. a restarted process, or
+        # concurrent invalidations from several processes). Versions
+        # of different processes may differ, but never go backwards.
+        self._versions[namespace] = max(
+            self.version(namespace) + 1,
+            message["version"],
+        )
+        for handler in self._handlers.get(namespace, []):
+            try:
+                result = handler(message["data"])
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:
+                logging.error(f"Failed to invalidate {namespace} cache")
+
+    @abc.abstractmethod
+    async def _send(self, message: dict[str, Any]) -> None:
+        """Deliver the message to the other processes."""
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "received": self.received,
+            "versions": dict(self._versions),
+        }
+
+
+class LocalBus(InvalidationBus):
+    """In-process bus, delivering messages to buses of the same group."""
+
+    def __init__(self, group: list["LocalBus"] | None = None):
+        super().__init__()
+        self.group = group if group is not None else []
+        self.group.append(self)
+
+    async def _send(self, message: dict[str, Any]) -> None:
+        for bus in list(self.group):
+            if bus is not self:
+                await bus.receive(message)
+
+
+class EventStreamBus(InvalidationBus):
+    """Bus using events of the server messaging.
+
+    The events are not stored in the database. Their handler
+    is subscribed on all nodes.
+    """
+
+    def __init__(self, topic: str):
+        super().__init__()
+        self.topic = topic
+        EventStream.subscribe(topic, self._on_event, all_nodes=True)
+
+    async def _send(self, message: dict[str, Any]) -> None:
+        await EventStream.dispatch(
+            self.topic,
+            description=f"Invalidate {message['namespace']} cache",
+            summary=message,
+            store=False,
+        )
+
+    async def _on_event(self, event: EventModel) -> None:
+        if event.summary and "namespace" in event.summary:
+            await self.receive(event.summary)
@@ -0,0 +1,145 @@
+"""Incremental merging of layered settings overrides.
+
+Settings are resolved by applying layers of overrides on top of each
+other: defaults, studio overrides, project overrides and site
+overrides. Layers form a tree - all projects share the studio layer,
+all sites of a project share the project layer - identified by
+tuples such as:
+
+    ()                                  defaults
+    ("production",)                     studio overrides
+    ("production", "my_project")        project overrides
+    ("production", "my_project", "x")   site overrides
+
+`SettingsLayers` caches the merged result of every layer. When a layer
+changes, only that layer and layers above it are merged again (lazily,
+on the next resolve), results of other layers are reused.
+"""
+
+from typing import Any, Callable
+
+from .cache import LRUCache
+
+LayerKey = tuple[str, ...]
+
+
+def merge_overrides(base: Any, overrides: Any) -> Any:
+    """Apply overrides to the base value.
+
+    Dictionaries are merged recursively, everything else
+    (including lists) is replaced. Unchanged parts of the base
+    are shared with the result, not copied.
+    """
+    if isinstance(base, dict) and isinstance(overrides, dict):
+        result = dict(base)
+        for key, value in overrides.items():
+            result[key] = merge_overrides(base.get(key), value)
+        return result
+    return overrides
+
+
+class SettingsLayers:
+    """Cached merged results of a tree of settings layers.
+
+    `build`, when provided, converts a merged dictionary to the final
+    value (e.g. validates it using the settings model). It's called
+    once per merged result, by `resolve_model`.
+    """
+
+    def __init__(
+        self,
+        defaults: dict[str, Any],
+        build: Callable[[dict[str, Any]], Any] | None = None,
+        maxsize: int = 4096,
+    ):
+        self.build = build
+        self.merges = 0
+        self.builds = 0
+        self._revision = 0
+        self._layers: dict[LayerKey, tuple[int, dict[str, Any]]] = {
+            (): (0, defaults)
+        }
+        self._merged: LRUCache[LayerKey, _Merged] = LRUCache(maxsize=maxsize)
+
+    @property
+    def revision(self) -> int:
+        """Incremented on every change of any layer."""
+        return self._revision
+
+    def set_layer(self, key: LayerKey, overrides: dict[str, Any]) -> None:
+        """Set overrides of a layer (or defaults, when key is empty).
+
+        Setting the same overrides again does not change anything.
+        """
+        if (current := self._layers.get(key)) is not None and current[1] == overrides:
+            return
+        self._revision += 1
+        self._layers[key] = (self._revision, overrides)
+
+    def remove_layer(self, key: LayerKey) -> None:
+        if not key:
+            raise ValueError("Defaults can't be removed")
+        if self._layers.pop(key, None) is not None:
+            self._revision += 1
+            self._merged.pop(key)
+
+    def resolve(self, key: LayerKey) -> dict[str, Any]:
+        """Return the result of merging all layers up to the given one.
+
+        The result is shared with the cache and must not be modified.
+        """
+        return self._resolve(key).merged
+
+    def resolve_model(self, key: LayerKey) -> Any:
+        """Return the built value of the merged layers."""
+        if self.build is None:
+            raise ValueError("No build function is set")
+        entry = self._resolve(key)
+        if entry.model is _MISSING:
+            entry.model = self.build(entry.merged)
+            self.builds += 1
+        return entry.model
+
+    def _resolve(self, key: LayerKey) -> "_Merged":
+        cached = self._merged.get(key)
+        # Nothing has changed since the entry was last validated
+        if cached is not None and cached.checked == self._revision:
+            return cached
+
+        if key:
+            parent = self._resolve(key[:-1])
+            parent_stamp, parent_merged = parent.stamp, parent.merged
+        else:
+            parent_stamp, parent_merged = (), {}
+
+        revision, overrides = self._layers.get(key, (0, {}))
+        stamp = (*parent_stamp, revision)
+
+        if cached is not None and cached.stamp == stamp:
+            cached.checked = self._revision
+            return cached
+
+        if overrides:
+            merged = merge_overrides(parent_merged, overrides)
+            self.merges += 1
+        else:
+            # Layer without overrides is the same as its parent
+            merged = parent_merged
+        entry = _Merged(stamp, merged, self._revision)
+        self._merged.set(key, entry)
+        return entry
+
+
+_MISSING = object()
+
+
+class _Merged:
+    __slots__ = ("stamp", "merged", "checked", "model")
+
+    def __init__(self, stamp: tuple[int, ...], merged: dict[str, Any], checked: int):
+        # Revisions of the layer and all its parents
+        self.stamp = stamp
+        self.merged = merged
+        # Engine revision the stamp was last validated against
+        self.checked = checked
+        self.model: Any = _MISSING
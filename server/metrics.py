@@ -0,0 +1,190 @@
+"""Minimal metrics collection with Prometheus text exposition.
+
+Only what the example addon needs is implemented: counters,
+histograms and gauges. Values of gauges, and of counters whose
+totals are kept elsewhere, are read from a callback at the time
+the metrics are rendered.
+"""
+
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+Labels = tuple[tuple[str, str], ...]
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+def _labels(labels: dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels: Labels, extra: tuple[str, str] | None = None) -> str:
+    items = list(labels)
+    if extra is not None:
+        items.append(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._values: dict[Labels, float] = {}
+        self._callbacks: dict[Labels, Callable[[], float]] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _labels(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def set_function(self, callback: Callable[[], float], **labels: str) -> None:
+        """Read the value from `callback`, which must never decrease."""
+        self._callbacks[_labels(labels)] = callback
+
+    def value(self, **labels: str) -> float:
+        key = _labels(labels)
+        if (callback := self._callbacks.get(key)) is not None:
+            return callback()
+        return self._values.get(key, 0)
+
+    def render(self) -> Iterator[str]:
+        for labels, value in self._values.items():
+            yield f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+        for labels, callback in self._callbacks.items():
+            yield f"{self.name}{_format_labels(labels)} {_format_value(callback())}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        # labels -> (per-bucket counts, sum, count)
+        self._values: dict[Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        if (data := self._values.get(key)) is None:
+            data = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+            self._values[key] = data
+        counts, totals = data
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        totals[0] += value
+        totals[1] += 1
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels: str) -> int:
+        data = self._values.get(_labels(labels))
+        return int(data[1][1]) if data else 0
+
+    def render(self) -> Iterator[str]:
+        for labels, (counts, (total, count)) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = ("le", _format_value(bound))
+                yield f"{self.name}_bucket{_format_labels(labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(labels)} {int(count)}"
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self._callbacks: dict[Labels, Callable[[], float]] = {}
+
+    def set_function(self, callback: Callable[[], float], **labels: str) -> None:
+        self._callbacks[_labels(labels)] = callback
+
+    def render(self) -> Iterator[str]:
+        for labels, callback in self._callbacks.items():
+            yield f"{self.name}{_format_labels(labels)} {_format_value(callback())}"
+
+
+Metric = Counter | Histogram | Gauge
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str) -> Counter:
+        metric = Counter(self.prefix + name, description)
+        self._register(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(self.prefix + name, description, buckets)
+        self._register(metric)
+        return metric
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        metric = Gauge(self.prefix + name, description)
+        self._register(metric)
+        return metric
+
+    def render(self) -> str:
+        """Return all metrics in Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,93 @@
+"""List of uniquely named submodels with lookup by name."""
+
+from typing import Any, Generic, Iterable, Self, SupportsIndex, TypeVar
+
+from ayon_server.settings import ensure_unique_names
+
+T = TypeVar("T")
+
+
+class NamedList(list[T], Generic[T]):
+    """List of submodels with a unique `name` field.
+
+    Settings lists like `dict_like_list` behave as dictionaries keyed
+    by name. NamedList keeps a name index, so items may be looked up
+    by name in O(1):
+
+        settings.dict_like_list.by_name("foo")
+
+    The index is built lazily and dropped whenever the list is modified.
+    Renaming an item in place is not detected, call `reindex`
+    after doing that.
+    """
+
+    _index: dict[str, T] | None = None
+
+    @classmethod
+    def validate_unique(cls, items: Iterable[T]) -> "NamedList[T]":
+        """Create a NamedList, ensuring the names are unique.
+
+        The name index is built right away and used to detect
+        duplicates, which is what validators of the settings models
+        need anyway.
+        """
+        result = cls(items)
+        index = {item.name: item for item in result}  # type: ignore[attr-defined]
+        if len(index) != len(result):
+            # Let the server report the duplicate the usual way
+            ensure_unique_names(result)
+        result._index = index
+        return result
+
+    def by_name(self, name: str, default: Any = None) -> T | None:
+        if self._index is None:
+            self.reindex()
+        assert self._index is not None
+        return self._index.get(name, default)
+
+    def names(self) -> list[str]:
+        return [item.name for item in self]  # type: ignore[attr-defined]
+
+    def reindex(self) -> None:
+        self._index = {item.name: item for item in self}  # type: ignore[attr-defined]
+
+    # Every modification drops the index
+
+    def _modified(self) -> None:
+        self._index = None
+
+    def append(self, item: T) -> None:
+        self._modified()
+        super().append(item)
+
+    def extend(self, items: Iterable[T]) -> None:
+        self._modified()
+        super().extend(items)
+
+    def insert(self, i: SupportsIndex, item: T) -> None:
+        self._modified()
+        super().insert(i, item)
+
+    def remove(self, item: T) -> None:
+        self._modified()
+        super().remove(item)
+
+    def pop(self, i: SupportsIndex = -1) -> T:
+        self._modified()
+        return super().pop(i)
+
+    def clear(self) -> None:
+        self._modified()
+        super().clear()
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._modified()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: Any) -> None:
+        self._modified()
+        super().__delitem__(key)
+
+    def __iadd__(self, items: Iterable[T]) -> Self:  # type: ignore[misc, override]
+        self._modified()
+        return super().__iadd__(items)
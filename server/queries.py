@@ -0,0 +1,59 @@
+"""Per-project SQL statements.
+
+Each AYON project lives in its own database schema, so queries
+have to be rendered with the schema name. The helpers here check
+the project name is safe to use as a part of the identifier
+before rendering the query.
+
+Rendering is not cached: a query rendered for the same project
+always has the same text, and asyncpg already prepares statements
+per connection keyed by their text. That cache holds the last
+`statement_cache_size` statements of the server pool (100 by default),
+which many projects can outgrow; `benchmarks/prepared_queries.py`
+measures the cost. Statements prepared by the addon itself can not
+be kept instead, asyncpg invalidates them when the connection is
+released to the pool.
+"""
+
+import re
+from typing import Any, AsyncGenerator
+
+from ayon_server.exceptions import BadRequestException
+from ayon_server.lib.postgres import Postgres
+
+# Project names are used as a part of the schema identifier,
+# so only characters allowed in unquoted identifiers are accepted.
+PROJECT_NAME_RE = re.compile(r"^[a-zA-Z0-9_]+$")
+
+
+def project_schema(project_name: str) -> str:
+    """Return a name of the project schema.
+
+    Raises BadRequestException when the project name
+    is not safe to use as an identifier.
+    """
+    if not PROJECT_NAME_RE.match(project_name):
+        raise BadRequestException(f"Invalid project name {project_name!r}")
+    return f"project_{project_name}"
+
+
+def project_statement(project_name: str, query: str) -> str:
+    """Render a query template for the given project.
+
+    The template references the project schema as `{schema}`,
+    e.g. `SELECT id FROM {schema}.folders`.
+    """
+    return query.format(schema=project_schema(project_name))
+
+
+async def project_fetch(project_name: str, query: str, *args: Any) -> list[Any]:
+    return await Postgres.fetch(project_statement(project_name, query), *args)
+
+
+async def project_iterate(
+    project_name: str,
+    query: str,
+    *args: Any,
+) -> AsyncGenerator[Any, None]:
+    async for row in Postgres.iterate(project_statement(project_name, query), *args):
+        yield row
@@ -0,0 +1,140 @@
+"""Cached JSON schema of the settings models.
+
+The settings schema of a model is static for a given addon version,
+except for the enumerators resolved by `enum_resolver` functions.
+The static part is generated, postprocessed the same way the server
+postprocesses the schema for the settings UI, and serialized once per
+(addon name, addon version, model). The serialized schema is kept split into
+fragments around the enum fields, so at request time only the enum
+resolvers are called and only the enum fields (and the braces of the
+objects containing them) are serialized. Everything else is copied
+from the cache as text.
+"""
+
+import copy
+import inspect
+import json
+from typing import Any, Callable, Type
+
+from pydantic import BaseModel
+
+from ayon_server.settings.postprocess import postprocess_settings_schema
+
+SchemaPath = tuple[str, ...]
+
+_dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+
+class CachedSchema:
+    def __init__(
+        self,
+        schema: dict[str, Any],
+        resolvers: list[tuple[SchemaPath, Callable, set[str]]],
+    ):
+        self.schema = schema
+        self.resolvers = resolvers
+
+        # Objects containing enum fields are rendered per request from
+        # their pieces: serialized static parts (including the braces
+        # and the keys) and paths of the items containing enum fields.
+
+        enum_paths = {path for path, _, _ in self.resolvers}
+        parents = {(), *(path[:i] for path in enum_paths for i in range(len(path)))}
+        self._objects: dict[SchemaPath, list[str | SchemaPath]] = {}
+        for path in parents:
+            pieces: list[str | SchemaPath] = []
+            text = "{"
+            for i, (key, value) in enumerate(_get_path(schema, path).items()):
+                text += ("," if i else "") + _dumps(key) + ":"
+                child = (*path, key)
+                if child in parents or child in enum_paths:
+                    pieces += [text, child]
+                    text = ""
+                else:
+                    text += _dumps(value)
+            pieces.append(text + "}")
+            self._objects[path] = pieces
+
+    @classmethod
+    async def create(cls, model: Type[BaseModel]) -> "CachedSchema":
+        # pydantic caches the schema too, the copy is ours to modify
+        schema = copy.deepcopy(model.schema())
+        resolvers: list[tuple[SchemaPath, Callable, set[str]]] = []
+
+        containers: list[tuple[SchemaPath, dict[str, Any]]] = [((), schema)]
+        for name, definition in schema.get("definitions", {}).items():
+            containers.append((("definitions", name), definition))
+
+        for prefix, container in containers:
+            for field_name, prop in container.get("properties", {}).items():
+                resolver = prop.pop("enum_resolver", None)
+                if resolver is None:
+                    continue
+                params = set(inspect.signature(resolver).parameters)
+                path = (*prefix, "properties", field_name)
+                resolvers.append((path, resolver, params))
+
+        # Without the resolvers, only the static parts are postprocessed
+        await postprocess_settings_schema(schema, model)
+        return cls(schema, resolvers)
+
+    async def resolve_json(self, context: dict[str, Any]) -> str:
+        """Return JSON of the schema with enums resolved for the context.
+
+        Context may contain `addon`, `project_name`, `settings_variant`
+        and so on. Each resolver gets only the arguments it accepts.
+        """
+        enums: dict[SchemaPath, list[Any]] = {}
+        for path, resolver, params in self.resolvers:
+            values = resolver(**{k: v for k, v in context.items() if k in params})
+            if inspect.isawaitable(values):
+                values = await values
+            enums[path] = values
+        return self._render((), enums)
+
+    def _render(self, path: SchemaPath, enums: dict[SchemaPath, list[Any]]) -> str:
+        if path in enums:
+            prop = dict(_get_path(self.schema, path))
+            _set_enum(prop, enums[path])
+            return _dumps(prop)
+        return "".join(
+            piece if isinstance(piece, str) else self._render(piece, enums)
+            for piece in self._objects[path]
+        )
+
+
+def _get_path(schema: dict[str, Any], path: SchemaPath) -> dict[str, Any]:
+    node = schema
+    for key in path:
+        node = node[key]
+    return node
+
+
+def _set_enum(prop: dict[str, Any], values: list[Any]) -> None:
+    labels = None
+    if values and isinstance(values[0], dict):
+        labels = {item["value"]: item["label"] for item in values}
+        values = [item["value"] for item in values]
+
+    if prop.get("type") == "array":
+        prop["items"] = {**prop.get("items", {}), "enum": values}
+        prop["uniqueItems"] = True
+    else:
+        prop["enum"] = values
+    if labels is not None:
+        prop["enumLabels"] = labels
+
+
+_schemas: dict[tuple[str, str, str], CachedSchema] = {}
+
+
+async def get_cached_schema(
+    addon_name: str,
+    addon_version: str,
+    model: Type[BaseModel],
+) -> CachedSchema:
+    key = (addon_name, addon_version, model.__name__)
+    if (cached := _schemas.get(key)) is None:
+        cached = await CachedSchema.create(model)
+        _schemas[key] = cached
+    return cached
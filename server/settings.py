@@ -3,7 +3,7 @@ from typing import Literal, TYPE_CHECKING
 from pydantic import Field, validator
 
 from ayon_server.lib.postgres import Postgres
-from ayon_server.settings import BaseSettingsModel, ensure_unique_names, normalize_name
+from ayon_server.settings import BaseSettingsModel, normalize_name
 from ayon_server.settings.enum import folder_types_enum, anatomy_presets_enum, addon_all_app_host_names_enum
 from ayon_server.types import (
     ColorRGB_hex,
@@ -14,10 +14,16 @@ from ayon_server.types import (
     ColorRGBA_uint8,
 )
 
+from .cache import DependencyMemo
+from .defaults import cached_default, cached_default_field
+from .enums import PROJECT_TOPICS, cached_enum
+from .named_list import NamedList
+
 if TYPE_CHECKING:
-    from ayon_server.addons import BaseServerAddon
+    from . import ExampleAddon
 
 
+@cached_enum(ttl=300, invalidate_on=PROJECT_TOPICS)
 async def async_enum_resolver():
     """Return a list of project names."""
     return [row["name"] async for row in Postgres.iterate("SELECT name FROM projects")]
@@ -32,22 +38,48 @@ def enum_resolver():
     return [{"value": f"value{i}", "label": f"Label {i}"} for i in range(10)]
 
 
+# Values of list_of_strings per (project_name, settings_variant)
+_recursive_enum_memo: DependencyMemo[tuple[str | None, str], list[str]] = (
+    DependencyMemo(maxsize=256)
+)
+
+
 async def recursive_enum_resolver(
-    addon: "BaseServerAddon",
+    addon: "ExampleAddon",
     project_name: str | None = None,
     settings_variant: str = "production",
 ) -> list[str]:
+    """Return list_of_strings of the current settings.
+
+    The result is memoized per settings revision of the addon. When
+    settings change, the new list_of_strings is compared with the memoized
+    one and the enum is recomputed only when it differs.
+    """
     if addon is None:
         return []
 
+    key = (project_name, settings_variant)
+    revision = addon.settings_revision
+    found, result = _recursive_enum_memo.get(key, revision)
+    if found and result is not None:
+        return result
+
     if project_name:
-        settings = await addon.get_project_settings(
+        settings = await addon.get_cached_project_settings(
             project_name=project_name, variant=settings_variant
         )
+        list_of_strings = settings.list_of_strings
     else:
-        settings = await addon.get_studio_settings(variant=settings_variant)
+        list_of_strings = await addon.get_cached_setting(
+            "list_of_strings", variant=settings_variant
+        )
 
-    return settings.list_of_strings
+    return _recursive_enum_memo.update(
+        key,
+        revision,
+        tuple(list_of_strings),
+        lambda: list(list_of_strings),
+    )
 
 
 class Colors(BaseSettingsModel):
@@ -145,18 +177,31 @@ class NestedSettings(BaseSettingsModel):
         section="Pseudo-dynamic models",
     )
 
-    model1: ConditionalModel1 = Field(default_factory=ConditionalModel1)
-    model2: ConditionalModel2 = Field(default_factory=ConditionalModel2)
-    model3: ConditionalModel3 = Field(default_factory=ConditionalModel3)
+    model1: ConditionalModel1 = Field(
+        default_factory=cached_default(ConditionalModel1)
+    )
+    model2: ConditionalModel2 = Field(
+        default_factory=cached_default(ConditionalModel2)
+    )
+    model3: ConditionalModel3 = Field(
+        default_factory=cached_default(ConditionalModel3)
+    )
 
-    nested_list_of_submodels: list[CompactListSubmodel] = Field(
-        [
-            CompactListSubmodel(name="default", int_value=42, enum=["foo", "bar"]),
-        ],
+    nested_list_of_submodels: list[CompactListSubmodel] = cached_default_field(
+        lambda: NamedList(
+            [
+                CompactListSubmodel(name="default", int_value=42, enum=["foo", "bar"]),
+            ]
+        ),
         title="A list of compact objects",
         required_items=["default"],
     )
 
+    @validator("nested_list_of_submodels")
+    def ensure_unique_names(cls, value):
+        """Ensure name fields within the list have unique names."""
+        return NamedList.validate_unique(value)
+
 class GroupedSettings(BaseSettingsModel):
     _isGroup = True
     your_name: str = Field("", title="Name")
@@ -277,7 +322,7 @@ class ExampleSettings(BaseSettingsModel):
     )
 
     all_scopes_list_of_submodels: list[DictLikeSubmodel] = Field(
-        default_factory=list,
+        default_factory=NamedList,
         title="Dict-like list",
         scope=["studio", "project", "site"],
     )
@@ -339,43 +384,52 @@ class ExampleSettings(BaseSettingsModel):
     )
 
     colors: Colors = Field(
-        default_factory=Colors,
+        default_factory=cached_default(Colors),
         title="Colors",
     )
 
     # Settings models can be nested
 
     nested_settings: NestedSettings = Field(
-        default_factory=NestedSettings,
+        default_factory=cached_default(NestedSettings),
         title="Nested settings",
     )
 
     grouped_settings: GroupedSettings = Field(
-        default_factory=GroupedSettings,
+        default_factory=cached_default(GroupedSettings),
         title="Grouped settings",
         description="Nested settings submodel with grouping",
     )
 
-    list_of_submodels: list[CompactListSubmodel] = Field(
-        [
-            CompactListSubmodel(name="default", int_value=42, enum=["foo", "bar"]),
-        ],
+    list_of_submodels: list[CompactListSubmodel] = cached_default_field(
+        lambda: NamedList(
+            [
+                CompactListSubmodel(name="default", int_value=42, enum=["foo", "bar"]),
+            ]
+        ),
         title="A list of compact objects",
         required_items=["default"],
     )
 
     dict_like_list: list[DictLikeSubmodel] = Field(
-        default_factory=list,
+        default_factory=NamedList,
         title="Dict-like list",
     )
 
     #    error: str =  Field(verybadfield)
 
-    @validator("list_of_submodels", "dict_like_list")
+    @validator(
+        "list_of_submodels",
+        "dict_like_list",
+        "all_scopes_list_of_submodels",
+    )
     def ensure_unique_names(cls, value):
-        """Ensure name fields within the lists have unique names."""
-        ensure_unique_names(value)
-        return value
+        """Ensure name fields within the lists have unique names.
+
+        The lists are converted to NamedList, so their items
+        can be looked up by name.
+        """
+        return NamedList.validate_unique(value)
 
 
 # class ExampleSettings(BaseSettingsModel):
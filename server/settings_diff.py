@@ -0,0 +1,95 @@
+"""Field-level comparison of settings.
+
+`diff_settings` compares two settings trees and returns paths of the
+changed fields, e.g. `grouped_settings.favorite_color`. Items of lists
+of submodels with a `name` field are matched by name, so their paths
+look like `dict_like_list[foo].value1` and reordering such a list
+does not report its items as changed.
+
+`SettingsChangeNotifier` lets consumers subscribe to a path and get
+notified only when something at, above or below that path changes.
+"""
+
+import inspect
+from typing import Any, Awaitable, Callable
+
+from pydantic import BaseModel
+
+ChangeCallback = Callable[[list[str]], Awaitable[None] | None]
+
+
+def diff_settings(old: Any, new: Any, path: str = "") -> list[str]:
+    """Return paths of the fields which differ between old and new."""
+    if isinstance(old, BaseModel) and isinstance(new, BaseModel):
+        if type(old) is not type(new):
+            return [path]
+        changes = []
+        for name in new.__fields__:
+            changes.extend(
+                diff_settings(
+                    getattr(old, name),
+                    getattr(new, name),
+                    f"{path}.{name}" if path else name,
+                )
+            )
+        return changes
+
+    if _is_named_list(old) and _is_named_list(new):
+        old_items = {item.name: item for item in old}
+        new_items = {item.name: item for item in new}
+        changes = []
+        for name in old_items.keys() | new_items.keys():
+            item_path = f"{path}[{name}]"
+            if name not in old_items or name not in new_items:
+                changes.append(item_path)
+            else:
+                changes.extend(diff_settings(old_items[name], new_items[name], item_path))
+        return sorted(changes)
+
+    if old != new:
+        return [path]
+    return []
+
+
+def _is_named_list(value: Any) -> bool:
+    return isinstance(value, list) and all(
+        isinstance(item, BaseModel) and "name" in item.__fields__ for item in value
+    )
+
+
+def paths_overlap(a: str, b: str) -> bool:
+    """Return True when one path is equal to, or contains the other one.
+
+    An empty path is the whole settings tree.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    if not a or a == b:
+        return True
+    return b.startswith(a) and b[len(a)] in ".["
+
+
+class SettingsChangeNotifier:
+    def __init__(self):
+        self._subscribers: list[tuple[str, ChangeCallback]] = []
+
+    def subscribe(self, path: str, callback: ChangeCallback) -> None:
+        """Call `callback(changed_paths)` when a related path changes.
+
+        Use an empty path to get notified about any change.
+        """
+        self._subscribers.append((path, callback))
+
+    def unsubscribe(self, path: str, callback: ChangeCallback) -> None:
+        self._subscribers.remove((path, callback))
+
+    async def notify(self, changed: list[str]) -> None:
+        if not changed:
+            return
+        for path, callback in list(self._subscribers):
+            related = [c for c in changed if paths_overlap(path, c)]
+            if not related:
+                continue
+            result = callback(related)
+            if inspect.isawaitable(result):
+                await result
@@ -0,0 +1,140 @@
+"""Bulk resolution of site settings.
+
+Site settings are layered: the studio and project settings form the
+base, which is the same for all sites of a project, and each site
+may override the fields with "site" scope. For many sites at once,
+the base is resolved only once, overrides of all sites are fetched
+in a single query, and for each site only the values which differ
+from the base are returned.
+
+`SiteSettingsResolver` keeps the merged layers of the sites between
+requests (see layers.py), so a site is merged again only when its
+overrides or the base change.
+"""
+
+from typing import Any, Type
+
+from pydantic import BaseModel
+
+from .layers import SettingsLayers
+from .queries import project_fetch
+
+
+def site_scoped_fields(model: Type[BaseModel]) -> list[str]:
+    """Return names of the model fields which may be overridden per site."""
+    return [
+        name
+        for name, field in model.__fields__.items()
+        if "site" in field.field_info.extra.get("scope", ["studio", "project"])
+    ]
+
+
+def diff_values(base: dict[str, Any], values: dict[str, Any]) -> dict[str, Any]:
+    """Return items of values which differ from the base."""
+    result = {}
+    for key, value in values.items():
+        base_value = base.get(key)
+        if isinstance(value, dict) and isinstance(base_value, dict):
+            if nested := diff_values(base_value, value):
+                result[key] = nested
+        elif value != base_value:
+            result[key] = value
+    return result
+
+
+async def fetch_site_overrides(
+    project_name: str,
+    addon_name: str,
+    addon_version: str,
+    user_name: str,
+    site_ids: list[str],
+) -> dict[str, dict[str, dict[str, Any]]]:
+    """Fetch site and project-site overrides of all the sites at once.
+
+    Returns {site_id: {"site": data, "project": data}}.
+    """
+    result: dict[str, dict[str, dict[str, Any]]] = {
+        site_id: {"site": {}, "project": {}} for site_id in site_ids
+    }
+    rows = await project_fetch(
+        project_name,
+        """
+        SELECT site_id, 'site' AS layer, data
+        FROM public.site_settings
+        WHERE addon_name = $1 AND addon_version = $2
+        AND user_name = $3 AND site_id = ANY($4)
+        UNION ALL
+        SELECT site_id, 'project' AS layer, data
+        FROM {schema}.project_site_settings
+        WHERE addon_name = $1 AND addon_version = $2
+        AND user_name = $3 AND site_id = ANY($4)
+        """,
+        addon_name,
+        addon_version,
+        user_name,
+        site_ids,
+    )
+    for row in rows:
+        result[row["site_id"]][row["layer"]] = row["data"] or {}
+    return result
+
+
+class SiteSettingsResolver:
+    """Resolves site settings of the sites of a project.
+
+    The base (studio + project settings and the site settings
+    defaults) is the root layer shared by all the sites,
+    overrides of each site are a layer on top of it.
+    """
+
+    def __init__(self, site_settings_model: Type[BaseModel], maxsize: int = 10_000):
+        self.settings = _site_layers({}, maxsize)
+        self.site_settings = _site_layers(site_settings_model().dict(), maxsize)
+
+    def resolve(
+        self,
+        settings: BaseModel,
+        user_name: str,
+        overrides: dict[str, dict[str, dict[str, Any]]],
+    ) -> dict[str, Any]:
+        """Resolve the sites of the user.
+
+        `settings` are the resolved studio + project settings. Returns
+        the shared defaults and, for each site, only the values which
+        differ from them. Returned values are shared with the cache
+        and must not be modified.
+        """
+        fields = site_scoped_fields(type(settings))
+        settings_base = settings.dict(include=set(fields))
+        # Unchanged layers are kept, so are their merged results
+        self.settings.set_layer((), settings_base)
+
+        sites = {}
+        for site_id, layers in overrides.items():
+            key = (user_name, site_id)
+            self.settings.set_layer(
+                key, {k: v for k, v in layers["project"].items() if k in fields}
+            )
+            self.site_settings.set_layer(key, layers["site"])
+            sites[site_id] = {
+                "settings": self.settings.resolve_model(key),
+                "site_settings": self.site_settings.resolve_model(key),
+            }
+
+        return {
+            "defaults": {
+                "settings": settings_base,
+                "site_settings": self.site_settings.resolve(()),
+            },
+            "sites": sites,
+        }
+
+
+def _site_layers(defaults: dict[str, Any], maxsize: int) -> SettingsLayers:
+    # Merged sites are built into their differences from the defaults
+    layers = SettingsLayers(
+        defaults,
+        build=lambda merged: diff_values(layers.resolve(()), merged),
+        maxsize=maxsize,
+    )
+    return layers
@@ -0,0 +1,169 @@
+"""Read-only snapshots of resolved settings.
+
+A snapshot mirrors the structure of a settings model, but uses
+lightweight frozen objects with `__slots__` instead of pydantic
+models: lists become tuples (fields holding lists of named submodels
+keep the `by_name` lookup) and dicts become read-only mappings. Snapshots
+are immutable, so a single instance can be shared by all readers.
+
+Values derived from the settings may be precomputed at compile time
+by registering a function with `register_derived`.
+"""
+
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, Protocol, Type
+
+from pydantic import BaseModel
+from pydantic.fields import (
+    SHAPE_LIST,
+    SHAPE_SEQUENCE,
+    SHAPE_TUPLE_ELLIPSIS,
+    ModelField,
+)
+
+_snapshot_classes: dict[Type[BaseModel], type["SettingsSnapshot"]] = {}
+# Fields of the models holding lists of named submodels
+_named_lists: dict[Type[BaseModel], frozenset[str]] = {}
+_derived: dict[Type[BaseModel], dict[str, Callable[[BaseModel], Any]]] = {}
+
+
+class SettingsSnapshot:
+    __slots__: tuple[str, ...] = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+
+class NamedItems(tuple):
+    """Read-only list of named items with lookup by name."""
+
+    _index: dict[str, Any]
+
+    def __new__(cls, items: Iterable[Any]) -> "NamedItems":
+        result = super().__new__(cls, items)
+        # tuple subclasses without __slots__ have a __dict__
+        result._index = {item.name: item for item in result}
+        return result
+
+    def by_name(self, name: str, default: Any = None) -> Any:
+        return self._index.get(name, default)
+
+
+def register_derived(
+    model: Type[BaseModel],
+    name: str,
+    func: Callable[[BaseModel], Any],
+) -> None:
+    """Precompute `func(model_instance)` as attribute `name` of the snapshot."""
+    if model in _snapshot_classes:
+        raise RuntimeError(f"Snapshot of {model.__name__} is already compiled")
+    _derived.setdefault(model, {})[name] = func
+
+
+def _is_named_list(field: ModelField) -> bool:
+    return (
+        field.shape in (SHAPE_LIST, SHAPE_SEQUENCE, SHAPE_TUPLE_ELLIPSIS)
+        and isinstance(field.type_, type)
+        and issubclass(field.type_, BaseModel)
+        and "name" in field.type_.__fields__
+    )
+
+
+def _snapshot_class(model: Type[BaseModel]) -> type[SettingsSnapshot]:
+    if (cls := _snapshot_classes.get(model)) is None:
+        slots = (*model.__fields__, *_derived.get(model, {}))
+        cls = type(
+            f"{model.__name__}Snapshot",
+            (SettingsSnapshot,),
+            {"__slots__": slots},
+        )
+        # Decided by the field type, so empty lists get `by_name` too
+        _named_lists[model] = frozenset(
+            name for name, field in model.__fields__.items() if _is_named_list(field)
+        )
+        _snapshot_classes[model] = cls
+    return cls
+
+
+def compile_snapshot(value: Any) -> Any:
+    """Return a read-only snapshot of a settings model (or value)."""
+    if isinstance(value, BaseModel):
+        model = type(value)
+        cls = _snapshot_class(model)
+        named_lists = _named_lists[model]
+        snapshot: SettingsSnapshot = object.__new__(cls)
+        for name in model.__fields__:
+            field_value = compile_snapshot(getattr(value, name))
+            if name in named_lists and isinstance(field_value, tuple):
+                field_value = NamedItems(field_value)
+            object.__setattr__(snapshot, name, field_value)
+        for name, func in _derived.get(model, {}).items():
+            object.__setattr__(snapshot, name, compile_snapshot(func(value)))
+        return snapshot
+
+    if isinstance(value, (list, tuple)):
+        return tuple(compile_snapshot(item) for item in value)
+
+    if isinstance(value, dict):
+        return MappingProxyType({k: compile_snapshot(v) for k, v in value.items()})
+
+    if isinstance(value, set):
+        return frozenset(value)
+
+    return value
+
+
+#
+# Snapshots of the example settings
+#
+
+
+class ExampleSettingsSnapshot(Protocol):
+    """Snapshot attributes of ExampleSettings read by the addon."""
+
+    @property
+    def folder_type(self) -> str: ...
+
+
+
+def normalize_color(value: str | tuple, kind: str) -> tuple[float, ...]:
+    """Convert a color to RGBA floats.
+
+    `kind` is the representation of the value: "hex", "float" or "uint8".
+    Alpha of uint8 colors is a float from 0 to 1, like in ColorRGBA_uint8.
+    """
+    if isinstance(value, str):
+        digits = value.lstrip("#")
+        channels = [int(digits[i : i + 2], 16) / 255 for i in range(0, len(digits), 2)]
+    elif kind == "uint8":
+        channels = [c / 255 for c in value[:3]] + [float(c) for c in value[3:]]
+    else:
+        channels = [float(c) for c in value]
+    if len(channels) == 3:
+        channels.append(1.0)
+    return tuple(channels)
+
+
+def _normalized_colors(colors: BaseModel) -> dict[str, tuple[float, ...]]:
+    # Fields of Colors are named after their representation,
+    # e.g. rgba_uint8
+    return {
+        name: normalize_color(getattr(colors, name), name.rsplit("_", 1)[-1])
+        for name in colors.__fields__
+    }
+
+
+def _register_example_derived() -> None:
+    from .settings import Colors
+
+    register_derived(Colors, "normalized", _normalized_colors)
+
+
+_register_example_derived()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+
+"""Measure end-to-end approval latency of the service.
+
+Runs the service loop against a local stand-in server (see
+`standin.py`) and measures the time from a folder approval to the job
+being finished, waiting between enrollment attempts:
+
+- fixed: the original fixed 5 second sleep
+- backoff: adaptive backoff polling
+- push: woken up by events from the event websocket
+
+The simulated work takes no time. Run from the `services` directory
+(ayon-python-api and websocket-client have to be installed):
+
+    python -m benchmarks.approval_latency
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+from benchmarks.standin import StandInServer
+
+os.environ["EXAMPLE_SERVICE_WORK_DURATION"] = "0"
+
+import ayon_api  # noqa: E402
+
+from service.__main__ import SOURCE_TOPIC, process_event  # noqa: E402
+from service.pool import WorkerPool  # noqa: E402
+from service.wakeup import create_waker  # noqa: E402
+
+
+def make_pool(mode: str, server: StandInServer) -> WorkerPool:
+    if mode == "fixed":
+        return WorkerPool(process_event, min_delay=5.0, max_delay=5.0)
+    waker = None
+    if mode == "push":
+        waker = create_waker(server.url, "standin", [SOURCE_TOPIC])
+    return WorkerPool(process_event, waker=waker, min_delay=0.25, max_delay=5.0)
+
+
+def run(mode: str, server: StandInServer, approvals: int, max_gap: float) -> dict:
+    server.reset_counters()
+    pool = make_pool(mode, server)
+    pool.start()
+    time.sleep(0.5)  # let the websocket connect
+
+    rnd = random.Random(0)
+    for _ in range(approvals):
+        time.sleep(rnd.uniform(0, max_gap))
+        server.approve()
+    server.wait_finished(approvals, timeout=30)
+
+    pool.stop(timeout=10)
+
+    latencies = sorted(server.latencies())
+    enrolls = server.requests["POST /api/enroll"]
+    return {
+        "mode": mode,
+        "approvals": len(latencies),
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "max_ms": latencies[-1] * 1000,
+        "enroll_requests": enrolls,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--approvals", type=int, default=10)
+    parser.add_argument(
+        "--max-gap",
+        type=float,
+        default=3.0,
+        help="Maximum number of seconds between approvals",
+    )
+    parser.add_argument("--modes", nargs="+", default=["fixed", "backoff", "push"])
+    args = parser.parse_args()
+
+    server = StandInServer().start()
+    ayon_api.init_service(token="standin", server_url=server.url)
+    try:
+        for mode in args.modes:
+            result = run(mode, server, args.approvals, args.max_gap)
+            print(
+                f"{result['mode']:<8} {result['approvals']:>4} approvals"
+                f"   mean {result['mean_ms']:9.1f} ms"
+                f"   p50 {result['p50_ms']:9.1f} ms"
+                f"   max {result['max_ms']:9.1f} ms"
+                f"   {result['enroll_requests']:>5} enroll requests"
+            )
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+"""Measure how fast the service drains a burst of approvals.
+
+A number of folders is approved at once on a local stand-in server
+(see `standin.py`) and the service processes them with worker pools
+of different sizes. Reports the time to finish all the jobs and the
+throughput of every worker. Run from the `services` directory
+(ayon-python-api has to be installed):
+
+    python -m benchmarks.burst --concurrency 1 4 16
+"""
+
+import argparse
+import time
+
+import ayon_api
+
+from benchmarks.standin import StandInServer
+from service import __main__ as service
+from service.pool import WorkerPool
+
+
+def run(server: StandInServer, approvals: int, concurrency: int) -> WorkerPool:
+    server.reset_counters()
+    pool = WorkerPool(
+        service.process_event,
+        concurrency=concurrency,
+        min_delay=0.05,
+        max_delay=0.5,
+    )
+    for _ in range(approvals):
+        server.approve()
+
+    start = time.perf_counter()
+    pool.start()
+    finished = server.wait_finished(approvals, timeout=600)
+    elapsed = time.perf_counter() - start
+    pool.stop()
+
+    jobs = sum(stats["jobs"] for stats in pool.stats())
+    status = "" if finished else " (timed out)"
+    print(
+        f"concurrency {concurrency:>3}: {jobs} jobs in {elapsed:7.2f} s"
+        f"   {jobs / elapsed:8.1f} jobs/s{status}"
+    )
+    for stats in pool.stats():
+        print(
+            f"    {stats['worker']:<10} {stats['jobs']:>5} jobs"
+            f"   {stats['jobs_per_sec']:6.2f} jobs/s"
+            f"   {stats['utilization']:4.0%} busy"
+        )
+    return pool
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--approvals", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument(
+        "--work-duration",
+        type=float,
+        default=0.2,
+        help="Seconds the service pretends to work on a job",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.005,
+        help="Simulated server latency of every request (seconds)",
+    )
+    args = parser.parse_args()
+
+    service.WORK_DURATION = args.work_duration
+    server = StandInServer(latency=args.latency).start()
+    ayon_api.init_service(token="standin", server_url=server.url)
+    try:
+        for concurrency in args.concurrency:
+            run(server, args.approvals, concurrency)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+"""Compare jobs per second of the service runtimes under load.
+
+A backlog of approvals is created on a local stand-in server (see
+`standin.py`), which runs in a subprocess and delays every request to
+simulate a remote server, and drained by:
+
+- sync: the original loop, one job at a time (a single worker)
+- threads: the threaded worker pool
+- asyncio: the asyncio runtime with a pool of keep-alive connections
+
+Run from the `services` directory (ayon-python-api and aiohttp have to
+be installed):
+
+    python -m benchmarks.load --concurrency 32 --pool-size 8
+"""
+
+import argparse
+import asyncio
+import functools
+import subprocess
+import sys
+import time
+from typing import Any
+
+import ayon_api
+import requests
+
+from service import __main__ as service
+from service.aio import AsyncAyonClient, AsyncWorkerPool
+from service.cache import SourceEventCache
+from service.pool import WorkerPool
+
+
+class RemoteStandIn:
+    """Stand-in server running in a subprocess."""
+
+    def __init__(self, latency: float):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.standin", "--latency", str(latency)],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        assert self.process.stdout is not None
+        self.url = self.process.stdout.readline().strip()
+        self.session = requests.Session()
+
+    def approve(self, count: int) -> None:
+        self.session.post(f"{self.url}/_standin/approve", json={"count": count})
+
+    def reset(self) -> None:
+        self.session.post(f"{self.url}/_standin/reset")
+
+    def stats(self) -> dict[str, Any]:
+        return self.session.get(f"{self.url}/_standin/stats").json()
+
+    def wait_drained(self, interval: float = 0.01) -> None:
+        """Wait until all the approvals were enrolled."""
+        while self.stats()["pending"]:
+            time.sleep(interval)
+
+    def stop(self) -> None:
+        self.process.terminate()
+        self.process.wait()
+
+
+def drain_threads(server: RemoteStandIn, concurrency: int) -> list[dict[str, Any]]:
+    pool = WorkerPool(
+        service.process_event,
+        concurrency=concurrency,
+        min_delay=0.05,
+        max_delay=0.5,
+    )
+    pool.start()
+    server.wait_drained()
+    pool.stop()
+    return pool.stats()
+
+
+async def drain_asyncio(
+    server: RemoteStandIn,
+    concurrency: int,
+    pool_size: int,
+) -> list[dict[str, Any]]:
+    client = AsyncAyonClient(server.url, "standin", pool_size=pool_size)
+    pool = AsyncWorkerPool(
+        functools.partial(service.process_event_async, client),
+        concurrency=concurrency,
+        min_delay=0.05,
+        max_delay=0.5,
+    )
+
+    async def interrupt_when_drained() -> None:
+        await asyncio.to_thread(server.wait_drained)
+        pool.interrupt()
+
+    await asyncio.gather(pool.run(), interrupt_when_drained())
+    await client.aclose()
+    return pool.stats()
+
+
+def run(
+    server: RemoteStandIn,
+    runtime: str,
+    approvals: int,
+    concurrency: int,
+    pool_size: int,
+) -> None:
+    service.source_events = SourceEventCache()
+    server.approve(approvals)
+    server.reset()
+
+    start = time.perf_counter()
+    if runtime == "sync":
+        stats = drain_threads(server, 1)
+    elif runtime == "threads":
+        stats = drain_threads(server, concurrency)
+    else:
+        stats = asyncio.run(drain_asyncio(server, concurrency, pool_size))
+    elapsed = time.perf_counter() - start
+
+    jobs = sum(worker["jobs"] for worker in stats)
+    label = runtime if runtime == "sync" else f"{runtime} x{concurrency}"
+    if runtime == "asyncio":
+        label += f" ({pool_size} connections)"
+    print(f"{label:<32} {jobs:>5} jobs in {elapsed:6.2f} s   {jobs / elapsed:8.1f} jobs/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--approvals", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument(
+        "--runtimes",
+        nargs="+",
+        default=["sync", "threads", "asyncio"],
+        choices=["sync", "threads", "asyncio"],
+    )
+    parser.add_argument(
+        "--work-duration",
+        type=float,
+        default=0.05,
+        help="Seconds the service pretends to work on a job",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.02,
+        help="Simulated server latency of every request (seconds)",
+    )
+    args = parser.parse_args()
+
+    service.WORK_DURATION = args.work_duration
+    server = RemoteStandIn(args.latency)
+    ayon_api.init_service(token="standin", server_url=server.url)
+    try:
+        for runtime in args.runtimes:
+            # The original loop is slow, so it gets a smaller backlog
+            approvals = args.approvals if runtime != "sync" else args.approvals // 10
+            run(server, runtime, approvals, args.concurrency, args.pool_size)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
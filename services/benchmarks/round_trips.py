@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+"""Count requests the service makes per job, with and without batching.
+
+A backlog of approvals is created on a local stand-in server (see
+`standin.py`) and drained by the service processing jobs one by one
+and in batches, optionally with source events cached as they arrive
+over the event websocket. Reports requests per job by endpoint and the time to
+drain the backlog. Run from the `services` directory (ayon-python-api
+has to be installed):
+
+    python -m benchmarks.round_trips --batch-size 1 10 50 --push
+"""
+
+import argparse
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ayon_api
+
+from benchmarks.standin import StandInServer
+from service import __main__ as service
+from service.batch import StatusUpdates
+from service.cache import SourceEventCache
+from service.pool import WorkerPool
+from service.wakeup import create_waker
+
+
+def run(server: StandInServer, approvals: int, batch_size: int, push: bool) -> None:
+    server.reset_counters()
+    service.source_events = SourceEventCache()
+
+    updates = None
+    executor = None
+    if batch_size > 1:
+        updates = StatusUpdates(flush_interval=0.1)
+        updates.start()
+        executor = ThreadPoolExecutor(batch_size, thread_name_prefix="job")
+        process = functools.partial(
+            service.process_batch, updates, batch_size, executor
+        )
+    else:
+        process = service.process_event
+    waker = None
+    if push:
+        waker = create_waker(
+            server.url,
+            "standin",
+            [service.SOURCE_TOPIC],
+            on_event=service.source_events.add_message,
+        )
+    pool = WorkerPool(process, waker=waker, min_delay=0.05, max_delay=0.5)
+
+    start = time.perf_counter()
+    pool.start()
+    time.sleep(0.2)  # let the websocket connect
+    for _ in range(approvals):
+        server.approve()
+    while server.pending:
+        time.sleep(0.01)
+    pool.stop()
+    if executor is not None:
+        executor.shutdown()
+    if updates is not None:
+        updates.stop()
+    elapsed = time.perf_counter() - start
+
+    jobs = sum(stats["jobs"] for stats in pool.stats())
+    requests = {
+        name: count
+        for name, count in server.requests.items()
+        if name.split()[1] in ("/api/enroll", "/api/events/{id}", "/graphql")
+    }
+    total = sum(requests.values())
+    mode = "push" if push else "poll"
+    print(
+        f"batch size {batch_size:>3}, {mode}: {jobs} jobs in {elapsed:6.2f} s"
+        f"   {total / jobs:5.2f} requests per job"
+    )
+    for name, count in sorted(requests.items()):
+        print(f"    {name:<24} {count / jobs:6.2f} per job")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--approvals", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument(
+        "--push",
+        action="store_true",
+        help="Also run with the event websocket priming the source event cache",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.005,
+        help="Simulated server latency of every request (seconds)",
+    )
+    args = parser.parse_args()
+
+    service.WORK_DURATION = 0
+    server = StandInServer(latency=args.latency).start()
+    ayon_api.init_service(token="standin", server_url=server.url)
+    try:
+        for push in (False, True) if args.push else (False,):
+            for batch_size in args.batch_size:
+                run(server, args.approvals, batch_size, push)
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
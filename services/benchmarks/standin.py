@@ -0,0 +1,357 @@
+"""Local stand-in of the AYON server for benchmarking the service.
+
+Implements only the endpoints the service uses (through ayon_api):
+availability check, server info, current user, event enrollment,
+reading and updating events, GraphQL query of events by ids and the
+event websocket. Folder approvals are simulated by
+calling `StandInServer.approve`, which stores a source event and
+notifies websocket clients, the same way the server does.
+
+Every request can be delayed by `latency` seconds, to simulate
+a remote server.
+
+The server may also run in its own process (so it does not compete
+with the measured service for the GIL), controlled over HTTP:
+
+    python -m benchmarks.standin --latency 0.02
+
+- POST /_standin/approve {"count": n} approves n folders
+- GET /_standin/stats returns the pending and processed approvals
+  and the request counts
+- POST /_standin/reset resets the counters
+"""
+
+import argparse
+import base64
+import collections
+import hashlib
+import json
+import re
+import socket
+import struct
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+SOURCE_TOPIC = "entity.folder.status_changed"
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+class StandInServer:
+    def __init__(self, latency: float = 0.0, port: int = 0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.events: dict[str, dict[str, Any]] = {}
+        # Source events waiting to be enrolled
+        self.pending: collections.deque[str] = collections.deque()
+        self.requests: collections.Counter[str] = collections.Counter()
+        # Source event id -> {"approved": t, "in_progress": t, "finished": t}
+        self.timeline: dict[str, dict[str, float]] = {}
+        self.done = threading.Condition(self.lock)
+        self._websockets: list["_Handler"] = []
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.standin = self  # type: ignore[attr-defined]
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_counters(self) -> None:
+        with self.lock:
+            self.requests.clear()
+            self.timeline.clear()
+
+    #
+    # Simulation
+    #
+
+    def approve(self, project_name: str = "demo", user_name: str = "admin") -> str:
+        """Simulate approval of a folder. Returns the source event id."""
+        event_id = uuid.uuid4().hex
+        with self.lock:
+            self.events[event_id] = {
+                "id": event_id,
+                "topic": SOURCE_TOPIC,
+                "project": project_name,
+                "user": user_name,
+                "dependsOn": None,
+                "status": "finished",
+                "payload": {"newValue": "Approved"},
+            }
+            self.pending.append(event_id)
+            self.timeline[event_id] = {"approved": time.perf_counter()}
+        self._broadcast(
+            {
+                "id": event_id,
+                "topic": SOURCE_TOPIC,
+                "project": project_name,
+                "user": user_name,
+            }
+        )
+        return event_id
+
+    def wait_finished(self, count: int, timeout: float) -> bool:
+        """Wait until `count` approvals were processed."""
+        deadline = time.monotonic() + timeout
+        with self.done:
+            while self._finished_count() < count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self.done.wait(remaining)
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        with self.lock:
+            return {
+                "pending": len(self.pending),
+                "finished": self._finished_count(),
+                "requests": dict(self.requests),
+            }
+
+    def _finished_count(self) -> int:
+        return sum(1 for t in self.timeline.values() if "finished" in t)
+
+    def latencies(self, stage: str = "finished") -> list[float]:
+        """Seconds from approval to the given job status."""
+        with self.lock:
+            return [
+                t[stage] - t["approved"] for t in self.timeline.values() if stage in t
+            ]
+
+    #
+    # API
+    #
+
+    def enroll(self, body: dict[str, Any]) -> dict[str, Any] | None:
+        with self.lock:
+            if not self.pending:
+                return None
+            source_id = self.pending.popleft()
+            job_id = uuid.uuid4().hex
+            job = {
+                "id": job_id,
+                "topic": body["targetTopic"],
+                "sender": body.get("sender"),
+                "dependsOn": source_id,
+                "status": "pending",
+                "description": body.get("description"),
+                "retries": 0,
+            }
+            self.events[job_id] = job
+            return dict(job)
+
+    def graphql(self, body: dict[str, Any]) -> dict[str, Any]:
+        """Answer queries of events by ids, nothing else."""
+        ids = (body.get("variables") or {}).get("ids")
+        if ids is None or "events(ids:" not in body.get("query", ""):
+            return {"errors": [{"message": "Query is not supported"}]}
+        with self.lock:
+            nodes = [
+                {key: self.events[i].get(key) for key in ("id", "project", "user")}
+                for i in ids
+                if i in self.events
+            ]
+        return {"data": {"events": {"edges": [{"node": node} for node in nodes]}}}
+
+    def update_event(self, event_id: str, body: dict[str, Any]) -> bool:
+        with self.done:
+            event = self.events.get(event_id)
+            if event is None:
+                return False
+            event.update(body)
+            status = body.get("status")
+            timeline = self.timeline.get(event.get("dependsOn") or "")
+            if timeline is not None and status in ("in_progress", "finished"):
+                timeline[status] = time.perf_counter()
+                self.done.notify_all()
+            return True
+
+    def _broadcast(self, message: dict[str, Any]) -> None:
+        data = json.dumps(message).encode()
+        for handler in list(self._websockets):
+            try:
+                handler.send_frame(data)
+            except OSError:
+                self._websockets.remove(handler)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self) -> None:
+        super().setup()
+        # Headers and body are written separately, don't let Nagle's
+        # algorithm delay the body of keep-alive responses
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    @property
+    def standin(self) -> StandInServer:
+        return self.server.standin  # type: ignore[attr-defined]
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _reply(self, status: int, data: Any = None) -> None:
+        body = b"" if data is None else json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _handle(self, method: str) -> None:
+        path = self.path.split("?")[0]
+        if path == "/ws" and self.headers.get("Upgrade", "").lower() == "websocket":
+            self._websocket()
+            return
+
+        body = self._body() if method in ("POST", "PATCH") else {}
+        standin = self.standin
+
+        if path.startswith("/_standin/"):
+            self._control(method, path, body)
+            return
+        with standin.lock:
+            standin.requests[f"{method} {re.sub(r'[0-9a-f]{32}', '{id}', path)}"] += 1
+        if standin.latency:
+            time.sleep(standin.latency)
+
+        if method == "GET" and path == "/":
+            self._reply(200, {})
+        elif method == "GET" and path == "/api/info":
+            self._reply(200, {"version": "1.0.0"})
+        elif method == "GET" and path == "/api/users/me":
+            self._reply(200, {"name": "service", "data": {"isService": True}})
+        elif method == "POST" and path == "/graphql":
+            self._reply(200, standin.graphql(body))
+        elif method == "POST" and path == "/api/enroll":
+            job = standin.enroll(body)
+            self._reply(204) if job is None else self._reply(200, job)
+        elif match := re.fullmatch(r"/api/events/(\w+)", path):
+            event_id = match.group(1)
+            if method == "GET":
+                with standin.lock:
+                    event = standin.events.get(event_id)
+                self._reply(404) if event is None else self._reply(200, event)
+            elif method == "PATCH":
+                found = standin.update_event(event_id, body)
+                self._reply(204 if found else 404)
+            else:
+                self._reply(405)
+        else:
+            self._reply(404, {"detail": f"{method} {path} is not implemented"})
+
+    def _control(self, method: str, path: str, body: dict[str, Any]) -> None:
+        standin = self.standin
+        if method == "POST" and path == "/_standin/approve":
+            ids = [standin.approve() for _ in range(body.get("count", 1))]
+            self._reply(200, {"ids": ids})
+        elif method == "GET" and path == "/_standin/stats":
+            self._reply(200, standin.stats())
+        elif method == "POST" and path == "/_standin/reset":
+            standin.reset_counters()
+            self._reply(204)
+        else:
+            self._reply(404)
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_PATCH(self) -> None:
+        self._handle("PATCH")
+
+    #
+    # Websocket (RFC 6455, text frames only)
+    #
+
+    def _websocket(self) -> None:
+        key = self.headers["Sec-WebSocket-Key"]
+        accept = base64.b64encode(
+            hashlib.sha1((key + WS_GUID).encode()).digest()
+        ).decode()
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+        self.wfile.flush()
+
+        self._send_lock = threading.Lock()
+        self.standin._websockets.append(self)
+        try:
+            while True:
+                opcode, _ = self._read_frame()
+                if opcode == 0x8:  # close
+                    break
+                if opcode == 0x9:  # ping
+                    self.send_frame(b"", opcode=0xA)
+        except (OSError, struct.error):
+            pass
+        finally:
+            if self in self.standin._websockets:
+                self.standin._websockets.remove(self)
+            self.close_connection = True
+
+    def _read_frame(self) -> tuple[int, bytes]:
+        head = self.rfile.read(2)
+        if len(head) < 2:
+            raise OSError("Connection closed")
+        opcode = head[0] & 0x0F
+        length = head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", self.rfile.read(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", self.rfile.read(8))[0]
+        mask = self.rfile.read(4) if head[1] & 0x80 else b"\0\0\0\0"
+        data = self.rfile.read(length)
+        return opcode, bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+
+    def send_frame(self, data: bytes, opcode: int = 0x1) -> None:
+        length = len(data)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        with self._send_lock:
+            self.wfile.write(header + data)
+            self.wfile.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the stand-in server")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StandInServer(latency=args.latency, port=args.port)
+    # The first line of the output tells the parent process the url
+    print(server.url, flush=True)
+    server._httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
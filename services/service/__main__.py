@@ -1,38 +1,176 @@
+import asyncio
+import functools
+import os
+import signal
 import socket
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
 
 import ayon_api
+from nxtools import log_traceback, logging
+
+from .aio import AsyncAyonClient, AsyncWorkerPool
+from .batch import StatusUpdates, enroll_jobs
+from .cache import SourceEventCache
+from .pool import JobsFailed, WorkerPool
+from .wakeup import create_waker
 
 
 SENDER = f"example-service-{socket.gethostname()}"
+SOURCE_TOPIC = "entity.folder.status_changed"
+
+# Jobs which failed are enrolled again, up to this number of times
+MAX_RETRIES = 3
+
+# Projects and users of recently seen source events
+source_events = SourceEventCache(
+    int(os.environ.get("EXAMPLE_SERVICE_CACHE_SIZE", 10_000))
+)
+
+# Seconds the service pretends to work on a job
+WORK_DURATION = float(os.environ.get("EXAMPLE_SERVICE_WORK_DURATION", 2))
+
+
+ENROLL_ARGS = {
+    "source_topic": SOURCE_TOPIC,
+    "target_topic": "example.approval_handler",
+    "sender": SENDER,
+    "description": "Approved folder detected. Thinking...",
+    "max_retries": MAX_RETRIES,
+    "events_filter": {
+        "conditions": [
+            {
+                "key": "payload/newValue",
+                "value": "Approved",
+            }
+        ]
+    },
+}
+
+
+def enroll_job() -> dict | None:
+    return ayon_api.enroll_event_job(**ENROLL_ARGS)
+
+
+def process_event() -> bool:
+    """Enroll and process one job. Return False if there was none."""
+    job = enroll_job()
+    if not job:
+        return False
+
+    try:
+        src_job = source_events.get(job["dependsOn"])
+        process_job(job, src_job, ayon_api.update_event)
+    except Exception:
+        mark_failed(job, ayon_api.update_event)
+        raise
+    return True
+
+
+def process_batch(
+    updates: StatusUpdates,
+    batch_size: int,
+    executor: ThreadPoolExecutor,
+) -> int:
+    """Enroll and process up to `batch_size` jobs.
+
+    Jobs of the batch are processed concurrently in `executor`, so
+    a claimed job does not wait for the ones enrolled before it.
+    Status updates are queued in `updates`.
+    Returns the number of processed jobs.
+    """
+    jobs = enroll_jobs(enroll_job, batch_size)
+    if not jobs:
+        return 0
+
+    source_events.prefetch([job["dependsOn"] for job in jobs])
 
+    def run(job: dict) -> bool:
+        try:
+            src_job = source_events.get(job["dependsOn"])
+            process_job(job, src_job, updates.put)
+        except Exception:
+            log_traceback(f"Failed to process job {job['id']}")
+            mark_failed(job, updates.put)
+            return False
+        return True
 
-def process_event():
-    job = ayon_api.enroll_event_job(
-        source_topic="entity.folder.status_changed",
-        target_topic="example.approval_handler",
+    failed = list(executor.map(run, jobs)).count(False)
+    if failed:
+        raise JobsFailed(len(jobs) - failed, failed)
+    return len(jobs)
+
+
+def process_job(job: dict, src_job: dict, update_event: Callable) -> None:
+    ayon_project_name = src_job["project"]
+
+    update_event(
+        job["id"],
+        sender=SENDER,
+        status="in_progress",
+        project_name=ayon_project_name,
+        description="Stand by. I am pretending to do something...",
+    )
+
+    time.sleep(WORK_DURATION)
+
+    update_event(
+        job["id"],
         sender=SENDER,
-        description="Approved folder detected. Thinking...",
-        max_retries=3,
-        events_filter={
-            "conditions": [
-                {
-                    "key": "payload/newValue",
-                    "value": "Approved",
-                }
-            ]
-        }
+        status="finished",
+        project_name=ayon_project_name,
+        description=f"Good job {src_job['user']}! Your folder has been approved.",
     )
 
+
+def mark_failed(job: dict, update_event: Callable) -> Any:
+    """Mark the job as failed.
+
+    Returns the result of `update_event`, which is a coroutine
+    for the asyncio client.
+    """
+    # Failed jobs are offered again by the server, until
+    # they run out of retries
+    return update_event(
+        job["id"],
+        sender=SENDER,
+        status="failed",
+        description="Failed to process the approval",
+    )
+
+
+#
+# Asyncio runtime
+#
+
+
+async def process_event_async(client: AsyncAyonClient) -> bool:
+    """Asyncio version of process_event."""
+    job = await client.enroll_event_job(**ENROLL_ARGS)
     if not job:
-        time.sleep(5)
-        return
+        return False
+
+    try:
+        src_job = source_events.events.get(job["dependsOn"])
+        if src_job is None:
+            src_job = source_events.add(await client.get_event(job["dependsOn"]))
+        await process_job_async(job, src_job, client)
+    except Exception:
+        await mark_failed(job, client.update_event)
+        raise
+    return True
+
 
-    src_job = ayon_api.get_event(job["dependsOn"])
+async def process_job_async(
+    job: dict,
+    src_job: dict,
+    client: AsyncAyonClient,
+) -> None:
     ayon_project_name = src_job["project"]
 
-    ayon_api.update_event(
+    await client.update_event(
         job["id"],
         sender=SENDER,
         status="in_progress",
@@ -40,9 +178,9 @@ def process_event():
         description="Stand by. I am pretending to do something...",
     )
 
-    time.sleep(2)
+    await asyncio.sleep(WORK_DURATION)
 
-    ayon_api.update_event(
+    await client.update_event(
         job["id"],
         sender=SENDER,
         status="finished",
@@ -51,9 +189,139 @@ def process_event():
     )
 
 
+async def main_async():
+    """Run the asyncio runtime until it is stopped.
+
+    EXAMPLE_SERVICE_CONCURRENCY: number of jobs processed concurrently
+    EXAMPLE_SERVICE_HTTP_POOL_SIZE: number of connections to the server
+        shared by all the jobs
+    """
+    con = ayon_api.get_server_api_connection()
+    client = AsyncAyonClient(
+        con.get_base_url(),
+        con.access_token,
+        pool_size=int(os.environ.get("EXAMPLE_SERVICE_HTTP_POOL_SIZE", 10)),
+    )
+    pool = AsyncWorkerPool(
+        functools.partial(process_event_async, client),
+        concurrency=int(os.environ.get("EXAMPLE_SERVICE_CONCURRENCY", 10)),
+        min_delay=float(os.environ.get("EXAMPLE_SERVICE_POLL_MIN_DELAY", 0.25)),
+        max_delay=float(os.environ.get("EXAMPLE_SERVICE_POLL_MAX_DELAY", 5)),
+    )
+
+    loop = asyncio.get_running_loop()
+
+    def on_event(message: dict) -> None:
+        # Called from the websocket thread
+        source_events.add_message(message)
+        loop.call_soon_threadsafe(pool.wake)
+
+    waker = None
+    if os.environ.get("EXAMPLE_SERVICE_WAKEUP", "push") == "push":
+        waker = create_waker(
+            con.get_base_url(),
+            con.access_token,
+            [SOURCE_TOPIC],
+            on_event=on_event,
+        )
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, pool.interrupt)
+
+    try:
+        await pool.run()
+    finally:
+        if waker is not None:
+            waker.stop()
+        await client.aclose()
+    pool.log_stats()
+    logging.info(f"Source event cache: {source_events.stats()}")
+
+
+#
+# Threaded runtime
+#
+
+
+def create_pool(process: Callable[[], int], concurrency: int) -> WorkerPool:
+    """Create a worker pool configured by environment variables.
+
+    EXAMPLE_SERVICE_WAKEUP: "push" (default) wakes up on source events
+        received over the event websocket, "poll" uses only the backoff
+    EXAMPLE_SERVICE_POLL_MIN_DELAY, EXAMPLE_SERVICE_POLL_MAX_DELAY:
+        bounds of the backoff between enrollment attempts (seconds)
+    """
+    waker = None
+    if os.environ.get("EXAMPLE_SERVICE_WAKEUP", "push") == "push":
+        con = ayon_api.get_server_api_connection()
+        waker = create_waker(
+            con.get_base_url(),
+            con.access_token,
+            [SOURCE_TOPIC],
+            # Source events are cached before their jobs are enrolled
+            on_event=source_events.add_message,
+        )
+    return WorkerPool(
+        process,
+        concurrency=concurrency,
+        waker=waker,
+        min_delay=float(os.environ.get("EXAMPLE_SERVICE_POLL_MIN_DELAY", 0.25)),
+        max_delay=float(os.environ.get("EXAMPLE_SERVICE_POLL_MAX_DELAY", 5)),
+    )
+
+
 def main():
-    while True:
-        process_event()
+    """Run the service until it is stopped.
+
+    EXAMPLE_SERVICE_RUNTIME: "threads" (default) or "asyncio"
+        (see main_async)
+    EXAMPLE_SERVICE_CONCURRENCY: number of workers enrolling jobs
+        (or batches of jobs) in parallel
+    EXAMPLE_SERVICE_BATCH_SIZE: when greater than 1, jobs are enrolled
+        in batches of up to this size and their status updates are sent
+        every EXAMPLE_SERVICE_FLUSH_INTERVAL seconds (see batch.py)
+    """
+    if os.environ.get("EXAMPLE_SERVICE_RUNTIME", "threads") == "asyncio":
+        asyncio.run(main_async())
+        return
+
+    concurrency = int(os.environ.get("EXAMPLE_SERVICE_CONCURRENCY", 1))
+    batch_size = int(os.environ.get("EXAMPLE_SERVICE_BATCH_SIZE", 1))
+    updates = None
+    executor = None
+    if batch_size > 1:
+        updates = StatusUpdates(
+            float(os.environ.get("EXAMPLE_SERVICE_FLUSH_INTERVAL", 0.5))
+        )
+        updates.start()
+        # Every worker processes up to a batch of jobs at once
+        executor = ThreadPoolExecutor(
+            batch_size * concurrency, thread_name_prefix="job"
+        )
+        pool = create_pool(
+            functools.partial(process_batch, updates, batch_size, executor),
+            concurrency,
+        )
+    else:
+        pool = create_pool(process_event, concurrency)
+
+    # Let the workers finish their jobs when the container is stopped
+    def shutdown(signum, frame):
+        logging.info("Shutting down")
+        pool.interrupt()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    pool.start()
+    pool.wait()
+    pool.stop()
+    if executor is not None:
+        executor.shutdown()
+    if updates is not None:
+        updates.stop()
+    pool.log_stats()
+    logging.info(f"Source event cache: {source_events.stats()}")
 
 
 if __name__ == "__main__":
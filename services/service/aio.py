@@ -0,0 +1,189 @@
+"""Asyncio runtime of the service.
+
+The threaded runtime uses the blocking module-level ayon_api functions,
+which open a new connection for every request and hold a thread for
+every job in flight. The asyncio runtime instead runs the workers as
+tasks in a single thread and shares one pool of keep-alive connections
+(`AsyncAyonClient`), so requests of many jobs are in flight at the same
+time over a bounded number of connections.
+
+Requires the optional `aiohttp` package.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable
+
+from nxtools import logging
+
+from .pool import JobsFailed, WorkerStats, log_worker_stats
+from .wakeup import Backoff
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncAyonClient:
+    """Minimal async client of the AYON REST API used by the service.
+
+    `pool_size` limits the number of open connections, which are
+    kept alive and shared by all requests. Must be created
+    in a running event loop.
+    """
+
+    def __init__(
+        self,
+        server_url: str,
+        api_key: str,
+        pool_size: int = 10,
+        timeout: float = 30.0,
+    ):
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is required by the asyncio runtime")
+        self.requests = 0
+        self.session = aiohttp.ClientSession(
+            server_url.rstrip("/"),
+            headers={"X-Api-Key": api_key},
+            connector=aiohttp.TCPConnector(limit=pool_size),
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        )
+
+    async def aclose(self) -> None:
+        await self.session.close()
+
+    async def request(self, method: str, path: str, **kwargs: Any) -> Any:
+        """Send a request and return the JSON response (None if empty)."""
+        self.requests += 1
+        async with self.session.request(method, path, **kwargs) as response:
+            response.raise_for_status()
+            # Responses may be chunked, so the body has to be read
+            # to tell whether it is empty
+            body = await response.read()
+            if response.status == 204 or not body.strip():
+                return None
+            return json.loads(body)
+
+    async def enroll_event_job(
+        self,
+        source_topic: str,
+        target_topic: str,
+        sender: str,
+        description: str | None = None,
+        sequential: bool | None = None,
+        events_filter: dict[str, Any] | None = None,
+        max_retries: int | None = None,
+    ) -> dict[str, Any] | None:
+        """Same as ayon_api.enroll_event_job."""
+        body: dict[str, Any] = {
+            "sourceTopic": source_topic,
+            "targetTopic": target_topic,
+            "sender": sender,
+        }
+        for key, value in (
+            ("description", description),
+            ("sequential", sequential),
+            ("filter", events_filter),
+            ("maxRetries", max_retries),
+        ):
+            if value is not None:
+                body[key] = value
+        # No content means there is nothing to enroll
+        return await self.request("POST", "/api/enroll", json=body)
+
+    async def get_event(self, event_id: str) -> dict[str, Any]:
+        return await self.request("GET", f"/api/events/{event_id}")
+
+    async def update_event(
+        self,
+        event_id: str,
+        project_name: str | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """Same as ayon_api.update_event."""
+        body = {key: value for key, value in kwargs.items() if value is not None}
+        if project_name is not None:
+            body["project"] = project_name
+        await self.request("PATCH", f"/api/events/{event_id}", json=body)
+
+
+class AsyncWorkerPool:
+    """Asyncio counterpart of WorkerPool.
+
+    `process` is a coroutine function with the same contract
+    as the `process` argument of WorkerPool.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[], Awaitable[int]],
+        concurrency: int = 10,
+        min_delay: float = 0.25,
+        max_delay: float = 5.0,
+    ):
+        if concurrency < 1:
+            raise ValueError("Concurrency must be at least 1")
+        self.process = process
+        self.concurrency = concurrency
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.workers: list[WorkerStats] = []
+        self._stop = asyncio.Event()
+        self._wake = asyncio.Event()
+
+    def wake(self) -> None:
+        """Wake up the idle workers (e.g. when a source event arrives)."""
+        self._wake.set()
+
+    def interrupt(self) -> None:
+        """Tell the workers to exit once they finish their current jobs."""
+        self._stop.set()
+        self._wake.set()
+
+    async def run(self) -> None:
+        """Run the workers until the pool is interrupted."""
+        self._stop.clear()
+        self.workers = [WorkerStats(f"task-{i}") for i in range(self.concurrency)]
+        await asyncio.gather(*(self._work(stats) for stats in self.workers))
+
+    async def _work(self, stats: WorkerStats) -> None:
+        backoff = Backoff(self.min_delay, self.max_delay)
+        while not self._stop.is_set():
+            start = time.monotonic()
+            try:
+                processed = int(await self.process())
+            except Exception as e:
+                if isinstance(e, JobsFailed):
+                    stats.jobs += e.processed
+                    stats.failed += e.failed
+                else:
+                    logging.error(f"{stats.name} failed to process a job")
+                    stats.failed += 1
+                stats.busy_time += time.monotonic() - start
+                await self._wait(backoff)
+                continue
+
+            if processed:
+                stats.jobs += processed
+                stats.busy_time += time.monotonic() - start
+                backoff.reset()
+            else:
+                stats.idle_polls += 1
+                await self._wait(backoff)
+
+    async def _wait(self, backoff: Backoff) -> None:
+        try:
+            await asyncio.wait_for(self._wake.wait(), backoff.next())
+        except asyncio.TimeoutError:
+            return
+        if not self._stop.is_set():
+            self._wake.clear()
+            backoff.reset()
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [stats.as_dict() for stats in self.workers]
+
+    def log_stats(self) -> None:
+        log_worker_stats(self.stats())
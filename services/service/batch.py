@@ -0,0 +1,169 @@
+"""Batched enrollment and queued status updates.
+
+Processing a job one by one costs at least four requests: enrolling it,
+reading its source event and two status updates. In the batched mode
+the service:
+
+- enrolls up to `batch_size` jobs in a row, as long as there are any,
+  and processes them concurrently
+- reads the source events of the whole batch in a single GraphQL query
+- queues the status updates in `StatusUpdates`, which sends them
+  periodically. Updates of the same job are coalesced, so a job which
+  finishes before its "in_progress" update was sent only gets the
+  "finished" one.
+
+The server enrolls a single job and updates a single event per request,
+so enrolling stays one request per job and the status updates of
+a flush are sent in parallel.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import ayon_api
+from nxtools import log_traceback, logging
+
+SOURCE_EVENTS_QUERY = """
+query SourceEvents($ids: [String!]) {
+    events(ids: $ids) {
+        edges { node { id project user } }
+    }
+}
+"""
+
+
+def enroll_jobs(
+    enroll: Callable[[], dict[str, Any] | None],
+    batch_size: int,
+) -> list[dict[str, Any]]:
+    """Enroll jobs until there are no more or the batch is full."""
+    jobs = []
+    while len(jobs) < batch_size:
+        job = enroll()
+        if not job:
+            break
+        jobs.append(job)
+    return jobs
+
+
+def get_source_events(event_ids: list[str]) -> dict[str, dict[str, Any]]:
+    """Return source events by their ids, fetched using one query.
+
+    Falls back to fetching the events one by one, when the query fails.
+    """
+    ids = list(dict.fromkeys(event_ids))
+    if len(ids) > 1:
+        try:
+            response = ayon_api.query_graphql(SOURCE_EVENTS_QUERY, {"ids": ids})
+            if not response.errors:
+                edges = response.data["data"]["events"]["edges"]
+                events = {edge["node"]["id"]: edge["node"] for edge in edges}
+                if len(events) == len(ids):
+                    return events
+        except Exception:
+            logging.warning("Failed to query source events, fetching one by one")
+    return {event_id: ayon_api.get_event(event_id) for event_id in ids}
+
+
+class StatusUpdates:
+    """Job status updates, sent every `flush_interval` seconds.
+
+    The server updates a single event per request, so the updates
+    queued since the last flush are sent in parallel, using up to
+    `max_workers` connections.
+
+    An update which fails is queued again, unless a newer update of
+    the same job overrides it, and is given up after `max_attempts`.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 0.5,
+        max_workers: int = 8,
+        max_attempts: int = 3,
+    ):
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._pending: dict[str, dict[str, Any]] = {}
+        self._attempts: dict[str, int] = {}
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="update")
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def coalesced(self) -> int:
+        """Number of updates merged into later updates of the same job."""
+        with self._lock:
+            return self.queued - self.sent - self.failed - len(self._pending)
+
+    def put(self, job_id: str, **kwargs: Any) -> None:
+        """Queue an update. Arguments are the same as of update_event."""
+        with self._lock:
+            self._pending.setdefault(job_id, {}).update(kwargs)
+            self.queued += 1
+
+    def flush(self) -> int:
+        """Send all queued updates. Returns the number of sent updates."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        results = list(self._executor.map(self._send, pending.items()))
+
+        sent = 0
+        with self._lock:
+            for (job_id, kwargs), success in zip(pending.items(), results):
+                if success:
+                    sent += 1
+                    self._attempts.pop(job_id, None)
+                    continue
+                attempts = self._attempts.get(job_id, 0) + 1
+                if attempts >= self.max_attempts:
+                    logging.error(
+                        f"Gave up updating job {job_id} after {attempts} attempts"
+                    )
+                    self._attempts.pop(job_id, None)
+                    self.failed += 1
+                    continue
+                self._attempts[job_id] = attempts
+                # Updates queued in the meantime are newer
+                self._pending[job_id] = {**kwargs, **self._pending.get(job_id, {})}
+            self.sent += sent
+        return sent
+
+    def _send(self, item: tuple[str, dict[str, Any]]) -> bool:
+        job_id, kwargs = item
+        try:
+            ayon_api.update_event(job_id, **kwargs)
+        except Exception:
+            log_traceback(f"Failed to update job {job_id}")
+            return False
+        return True
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flushing thread and send the remaining updates."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        # Failed updates are retried until they run out of attempts
+        while True:
+            self.flush()
+            with self._lock:
+                if not self._pending:
+                    break
+        self._executor.shutdown()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
@@ -0,0 +1,115 @@
+"""Cache of source events of the jobs.
+
+Processing a job needs only the project and the user of its source
+event. `SourceEventCache` keeps just these (as small dictionaries
+with `id`, `project` and `user`) for the most recently seen source
+events, so they are not fetched again for each job:
+
+- events received over the event websocket are stored as they arrive,
+  before their jobs are even enrolled
+- source events of a batch of enrolled jobs are prefetched using
+  a single query
+- jobs which are retried reuse the cached source event
+
+Many source events share the same project and user, so the cached
+entries share the project and user names instead of keeping a copy
+per event.
+"""
+
+import collections
+import threading
+from typing import Any, Generic, Hashable, TypeVar
+
+import ayon_api
+
+from .batch import get_source_events
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe cache keeping at most `maxsize` recently used items."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: collections.OrderedDict[K, V] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._data
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+class SourceEventCache:
+    def __init__(self, maxsize: int = 10_000):
+        self.events: LRUCache[str, dict[str, Any]] = LRUCache(maxsize)
+        # (project, user) pairs referenced by the cached events
+        self._metadata: LRUCache[tuple[str, str], tuple[str, str]] = LRUCache(
+            max(1, maxsize // 10)
+        )
+
+    def add(self, event: dict[str, Any]) -> dict[str, Any]:
+        """Store the project and user of an event."""
+        key = (event["project"], event["user"])
+        metadata = self._metadata.get(key)
+        if metadata is None:
+            metadata = key
+            self._metadata.set(key, metadata)
+        project, user = metadata
+        entry = {"id": event["id"], "project": project, "user": user}
+        self.events.set(event["id"], entry)
+        return entry
+
+    def add_message(self, message: dict[str, Any]) -> None:
+        """Store an event received over the event websocket."""
+        if message.get("id") and message.get("project") and "user" in message:
+            self.add(message)
+
+    def prefetch(self, event_ids: list[str]) -> None:
+        """Fetch events which are not cached yet using a single query."""
+        missing = [i for i in dict.fromkeys(event_ids) if i not in self.events]
+        if missing:
+            for event in get_source_events(missing).values():
+                self.add(event)
+
+    def get(self, event_id: str) -> dict[str, Any]:
+        event = self.events.get(event_id)
+        if event is None:
+            event = self.add(ayon_api.get_event(event_id))
+        return event
+
+    def stats(self) -> dict[str, Any]:
+        return self.events.stats()
@@ -0,0 +1,158 @@
+"""Pool of worker threads enrolling and processing jobs in parallel.
+
+Each worker runs the usual loop - enroll a job, process it, wait when
+there is none - so several jobs are processed at the same time and a
+slow job does not hold back the others. Workers have their own backoff
+and share the event websocket listener, so a burst of approvals wakes
+all the idle workers at once.
+
+`stop()` lets the workers finish the jobs they are processing and
+returns when all of them have exited.
+"""
+
+import threading
+import time
+from typing import Any, Callable
+
+from nxtools import logging
+
+from .wakeup import Backoff, EventWaker, JobWaiter
+
+
+class JobsFailed(Exception):
+    """Some jobs of a batch failed."""
+
+    def __init__(self, processed: int, failed: int):
+        super().__init__(f"{failed} jobs failed")
+        self.processed = processed
+        self.failed = failed
+
+
+class WorkerStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = time.monotonic()
+        self.jobs = 0
+        self.failed = 0
+        self.idle_polls = 0
+        self.busy_time = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        uptime = time.monotonic() - self.started_at
+        return {
+            "worker": self.name,
+            "jobs": self.jobs,
+            "failed": self.failed,
+            "idle_polls": self.idle_polls,
+            "jobs_per_sec": self.jobs / uptime if uptime else 0.0,
+            "utilization": self.busy_time / uptime if uptime else 0.0,
+        }
+
+
+class WorkerPool:
+    def __init__(
+        self,
+        process: Callable[[], int],
+        concurrency: int = 1,
+        waker: EventWaker | None = None,
+        min_delay: float = 0.25,
+        max_delay: float = 5.0,
+    ):
+        """
+        `process` enrolls and processes jobs and returns their count
+        (or a bool for a single job), zero when there was nothing to
+        enroll. An exception it raises counts as a failed job, unless
+        it is JobsFailed.
+        """
+        if concurrency < 1:
+            raise ValueError("Concurrency must be at least 1")
+        self.process = process
+        self.concurrency = concurrency
+        self.waker = waker
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._waiters: list[JobWaiter] = []
+        self.workers: list[WorkerStats] = []
+
+    @property
+    def is_running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self) -> None:
+        self._stop.clear()
+        for i in range(self.concurrency):
+            stats = WorkerStats(f"worker-{i}")
+            waiter = JobWaiter(Backoff(self.min_delay, self.max_delay), self.waker)
+            thread = threading.Thread(
+                target=self._work,
+                args=(waiter, stats),
+                name=stats.name,
+                daemon=True,
+            )
+            self.workers.append(stats)
+            self._waiters.append(waiter)
+            self._threads.append(thread)
+            thread.start()
+        logging.info(f"Started {self.concurrency} workers")
+
+    def interrupt(self) -> None:
+        """Tell the workers to exit once they finish their current jobs."""
+        self._stop.set()
+        for waiter in self._waiters:
+            waiter.interrupt()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the workers and wait until they exit."""
+        self.interrupt()
+        for thread in self._threads:
+            thread.join(timeout)
+        if self.waker is not None:
+            self.waker.stop()
+
+    def wait(self) -> None:
+        """Block until the pool is stopped."""
+        self._stop.wait()
+
+    def _work(self, waiter: JobWaiter, stats: WorkerStats) -> None:
+        while not self._stop.is_set():
+            start = time.monotonic()
+            try:
+                processed = int(self.process())
+            except Exception as e:
+                if isinstance(e, JobsFailed):
+                    stats.jobs += e.processed
+                    stats.failed += e.failed
+                else:
+                    logging.error(f"{stats.name} failed to process a job")
+                    stats.failed += 1
+                stats.busy_time += time.monotonic() - start
+                # Don't hammer the server, when it is not available
+                waiter.wait()
+                continue
+
+            if processed:
+                stats.jobs += processed
+                stats.busy_time += time.monotonic() - start
+                waiter.reset()
+            else:
+                stats.idle_polls += 1
+                waiter.wait()
+
+    def stats(self) -> list[dict[str, Any]]:
+        return [stats.as_dict() for stats in self.workers]
+
+    def log_stats(self) -> None:
+        log_worker_stats(self.stats())
+
+
+def log_worker_stats(workers: list[dict[str, Any]]) -> None:
+    for stats in workers:
+        logging.info(
+            f"{stats['worker']}: {stats['jobs']} jobs, "
+            f"{stats['failed']} failed, "
+            f"{stats['jobs_per_sec']:.2f} jobs/s, "
+            f"{stats['utilization']:.0%} busy"
+        )
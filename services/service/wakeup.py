@@ -0,0 +1,173 @@
+"""Waiting for new jobs between enrollment attempts.
+
+When there is nothing to enroll, the service waits before asking
+the server again. `JobWaiter` waits with an adaptive backoff (short
+delays right after a job was processed, growing up to `max_delay`
+while idle) and, when the server event websocket is available, wakes
+up as soon as an event of the source topic is dispatched.
+
+Listening to the websocket requires the optional `websocket-client`
+package. Without it (or when the connection fails) the service falls
+back to the backoff alone.
+"""
+
+import json
+import threading
+from typing import Any, Callable
+
+from nxtools import logging
+
+try:
+    import websocket
+except ImportError:
+    websocket = None
+
+
+class Backoff:
+    def __init__(
+        self,
+        min_delay: float = 0.25,
+        max_delay: float = 5.0,
+        factor: float = 2.0,
+    ):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self._delay = min_delay
+
+    def next(self) -> float:
+        """Return the delay to wait now and increase the following one."""
+        delay = self._delay
+        self._delay = min(self._delay * self.factor, self.max_delay)
+        return delay
+
+    def reset(self) -> None:
+        self._delay = self.min_delay
+
+
+class EventWaker:
+    """Set a flag whenever the server dispatches an event of given topics.
+
+    Runs the websocket client in a daemon thread and reconnects
+    automatically when the connection is lost.
+    """
+
+    def __init__(
+        self,
+        server_url: str,
+        token: str,
+        topics: list[str],
+        on_event: Callable[[dict[str, Any]], None] | None = None,
+    ):
+        self.url = server_url.replace("http", "ws", 1).rstrip("/") + "/ws"
+        self.token = token
+        self.topics = topics
+        self.on_event = on_event
+        self.connected = False
+        self.flag = threading.Event()
+        self._app = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._app = websocket.WebSocketApp(
+            self.url,
+            on_open=self._on_open,
+            on_message=self._on_message,
+            on_error=self._on_error,
+            on_close=self._on_close,
+        )
+        self._thread = threading.Thread(
+            target=self._app.run_forever,
+            kwargs={"reconnect": 5},
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self.connected = False
+        if self._app is not None:
+            self._app.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _on_open(self, app) -> None:
+        app.send(
+            json.dumps(
+                {"topic": "auth", "token": self.token, "subscribe": self.topics}
+            )
+        )
+        self.connected = True
+        logging.info(f"Listening to {', '.join(self.topics)} events")
+        # Events may have been missed while disconnected
+        self.flag.set()
+
+    def _on_message(self, app, message: str) -> None:
+        try:
+            data = json.loads(message)
+            topic = data.get("topic")
+        except (ValueError, AttributeError):
+            return
+        if topic not in self.topics:
+            return
+        if self.on_event is not None:
+            self.on_event(data)
+        self.flag.set()
+
+    def _on_error(self, app, error: Exception) -> None:
+        logging.warning(f"Event websocket error: {error}")
+
+    def _on_close(self, app, status_code, message) -> None:
+        if self.connected:
+            logging.warning("Event websocket closed, falling back to polling")
+        self.connected = False
+
+
+class JobWaiter:
+    def __init__(self, backoff: Backoff, waker: EventWaker | None = None):
+        self.backoff = backoff
+        self.waker = waker
+        self._interrupted = threading.Event()
+
+    def wait(self) -> None:
+        """Wait before the next enrollment attempt.
+
+        Returns early, when an event of the source topic arrives
+        or the waiter is interrupted.
+        """
+        delay = self.backoff.next()
+        if self.waker is None or not self.waker.connected:
+            self._interrupted.wait(delay)
+            return
+        if self.waker.flag.wait(delay):
+            self.waker.flag.clear()
+            # The event may not be enrollable yet (or was enrolled by
+            # another service), so keep asking often for a while
+            self.backoff.reset()
+
+    def reset(self) -> None:
+        """Call when a job was enrolled."""
+        self.backoff.reset()
+
+    def interrupt(self) -> None:
+        """Stop waiting now (e.g. when the service is shutting down)."""
+        self._interrupted.set()
+        if self.waker is not None:
+            self.waker.flag.set()
+
+
+def create_waker(
+    server_url: str,
+    token: str,
+    topics: list[str],
+    on_event: Callable[[dict[str, Any]], None] | None = None,
+) -> EventWaker | None:
+    """Start listening to the event websocket, if possible.
+
+    `on_event` is called with every received event of the topics.
+    """
+    if websocket is None:
+        logging.warning("websocket-client is not installed, using polling")
+        return None
+    waker = EventWaker(server_url, token, topics, on_event)
+    waker.start()
+    return waker
@@ -0,0 +1,10 @@
+"""Tests run against the fake ayon_server used by the benchmarks."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fakes  # noqa: E402
+
+fakes.install()
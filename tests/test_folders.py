@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+from ayon_server.exceptions import NotFoundException
+from benchmarks import fakes
+from server import ExampleAddon
+
+
+@pytest.fixture
+def addon():
+    fakes.FakePostgres.db.projects.clear()
+    fakes.FakePostgres.db.add_project("test", 100)
+    return ExampleAddon()
+
+
+def test_random_folder(addon):
+    user = fakes.FakeUserEntity()
+    folder = asyncio.run(addon.get_random_folder(user, "test"))
+    assert folder["id"] in fakes.FakePostgres.db.projects["test"]
+
+
+@pytest.mark.parametrize("endpoint", ["get_random_folder", "get_random_folders"])
+def test_random_folder_missing_project(addon, endpoint):
+    user = fakes.FakeUserEntity()
+    with pytest.raises(NotFoundException):
+        asyncio.run(getattr(addon, endpoint)(user, "missing"))
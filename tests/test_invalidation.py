@@ -0,0 +1,46 @@
+import asyncio
+
+from benchmarks import fakes
+from server import ExampleAddon
+
+
+class Addon(ExampleAddon):
+    favorite_color = "red"
+
+    async def get_studio_settings(self, variant: str = "production"):
+        settings = await super().get_studio_settings(variant)
+        settings.grouped_settings.favorite_color = self.favorite_color
+        return settings
+
+
+def settings_event(addon: ExampleAddon, project: str | None = None):
+    return fakes.FakeEventModel(
+        "settings.changed",
+        project=project,
+        summary={"addon_name": addon.name, "variant": "production"},
+    )
+
+
+def test_studio_settings_event_invalidates_cached_setting():
+    async def run():
+        addon = Addon()
+        assert await addon.get_cached_setting() == "red"
+
+        addon.favorite_color = "blue"
+        await addon.on_settings_event(settings_event(addon))
+        assert await addon.get_cached_setting() == "blue"
+
+    asyncio.run(run())
+
+
+def test_project_settings_event_keeps_cached_setting():
+    async def run():
+        addon = Addon()
+        assert await addon.get_cached_setting() == "red"
+        loads = addon.settings_loads
+
+        await addon.on_settings_event(settings_event(addon, project="test"))
+        assert await addon.get_cached_setting() == "red"
+        assert addon.settings_loads == loads
+
+    asyncio.run(run())
@@ -0,0 +1,56 @@
+import asyncio
+import copy
+import json
+
+import pytest
+
+from ayon_server.settings.postprocess import postprocess_settings_schema
+from server import ExampleAddon
+from server.schema import CachedSchema
+from server.settings import ExampleSettings
+from server.site_settings import ExampleSiteSettings
+
+COMPACT_LIST_DEFAULT = [{"name": "default", "int_value": 42, "enum": ["foo", "bar"]}]
+
+
+def test_list_defaults_in_schema():
+    schema = ExampleSettings.schema()
+    nested = schema["definitions"]["NestedSettings"]
+
+    assert schema["properties"]["list_of_submodels"]["default"] == (
+        COMPACT_LIST_DEFAULT
+    )
+    assert nested["properties"]["nested_list_of_submodels"]["default"] == (
+        COMPACT_LIST_DEFAULT
+    )
+
+
+def test_schema_defaults_match_model_defaults():
+    settings = ExampleSettings()
+    schema = ExampleSettings.schema()
+    for name, prop in schema["properties"].items():
+        if "default" in prop:
+            value = getattr(settings, name)
+            if isinstance(value, list):
+                value = [getattr(item, "dict", lambda: item)() for item in value]
+            assert prop["default"] == value, name
+
+
+@pytest.mark.parametrize("model", [ExampleSettings, ExampleSiteSettings])
+def test_cached_schema_matches_postprocessed_schema(model):
+    context = {
+        "addon": ExampleAddon(),
+        "project_name": None,
+        "settings_variant": "production",
+        "user_name": "admin",
+    }
+
+    async def run():
+        cached = await CachedSchema.create(model)
+        schema = copy.deepcopy(model.schema())
+        await postprocess_settings_schema(schema, model, context=context)
+        return json.loads(await cached.resolve_json(context)), schema
+
+    cached, uncached = asyncio.run(run())
+    # Round trip, so tuples in the schema compare equal to lists
+    assert cached == json.loads(json.dumps(uncached))